@@ -11,4 +11,5 @@ admin.site.register(api_models.Post)
 admin.site.register(api_models.Comment)
 admin.site.register(api_models.Bookmark)
 admin.site.register(api_models.Notification)
-
+admin.site.register(api_models.AuthorStats)
+admin.site.register(api_models.Job)
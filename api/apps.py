@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api import authentication, category_index, conditional, images, likes, response_cache, search, stats, view_counter
+        # Registers the job functions with api.jobs
+        from api import tasks  # noqa: F401
+        authentication.connect()
+        category_index.connect()
+        conditional.connect()
+        images.connect()
+        likes.connect()
+        response_cache.connect()
+        search.connect()
+        stats.connect()
+        view_counter.install_shutdown_hook()
@@ -0,0 +1,124 @@
+"""
+JWT authentication that doesn't load the User row on every request.
+
+Access tokens from MyTokenObtainPairSerializer already carry the user's id,
+email, username and full name. ``ClaimsJWTAuthentication`` verifies the
+token and returns a ``ClaimsUser`` answering those from the claims, and
+``is_active``/``is_staff``/``is_superuser`` from a small per-process cache
+refreshed every AUTH_USER_FLAGS_CACHE_TTL seconds, so a deactivated account
+is locked out within that time. Anything else (saving, related managers,
+``isinstance`` checks when assigned to a foreign key) loads the real User
+once, on first use.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from api import models as api_models
+
+FLAGS = ("is_active", "is_staff", "is_superuser")
+
+_lock = threading.Lock()
+_flags = OrderedDict()
+
+
+def user_flags(user_id):
+    """``{"is_active", "is_staff", "is_superuser"}`` for ``user_id``, or None if there's no such user."""
+    now = time.monotonic()
+    with _lock:
+        entry = _flags.get(user_id)
+        if entry is not None and entry[1] > now:
+            _flags.move_to_end(user_id)
+            return entry[0]
+
+    flags = api_models.User.objects.filter(pk=user_id).values(*FLAGS).first()
+    if flags is not None:
+        expires = now + getattr(settings, "AUTH_USER_FLAGS_CACHE_TTL", 30)
+        with _lock:
+            _flags[user_id] = (flags, expires)
+            _flags.move_to_end(user_id)
+            while len(_flags) > getattr(settings, "AUTH_USER_FLAGS_CACHE_SIZE", 10000):
+                _flags.popitem(last=False)
+    return flags
+
+
+def forget(sender=None, instance=None, **kwargs):
+    with _lock:
+        _flags.pop(instance.pk, None)
+
+
+def _known(source, name):
+    # ``source`` is the token or the cached flags; the loaded user wins.
+    def get(self):
+        if self._wrapped is empty:
+            value = self.__dict__[source].get(name)
+            if value is not None:
+                return value
+            self._setup()
+        return getattr(self._wrapped, name)
+    return property(get)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """A User whose row is only read if something beyond the token is needed."""
+
+    def __init__(self, token, flags):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: api_models.User.objects.get(pk=user_id))
+        # LazyObject forwards attribute writes to the wrapped user.
+        self.__dict__.update(token=token, user_id=user_id, flags=flags)
+
+    id = pk = property(lambda self: self.__dict__["user_id"])
+    is_authenticated = True
+    is_anonymous = False
+
+    email = _known("token", "email")
+    username = _known("token", "username")
+    full_name = _known("token", "full_name")
+    is_active = _known("flags", "is_active")
+    is_staff = _known("flags", "is_staff")
+    is_superuser = _known("flags", "is_superuser")
+
+    # LazyObject would load the user for these; IsAuthenticated calls bool().
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        if type(other) is ClaimsUser or isinstance(other, api_models.User):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return f"<ClaimsUser {self.pk}>"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        flags = user_flags(user_id)
+        if flags is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not flags["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimsUser(validated_token, flags)
+
+
+def connect():
+    User = api_models.User
+    post_save.connect(forget, sender=User, dispatch_uid="authentication_user_saved")
+    post_delete.connect(forget, sender=User, dispatch_uid="authentication_user_deleted")
@@ -0,0 +1,105 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks seed their own rows inside a transaction that is rolled back when
+they finish, so they can run against a development database without leaving
+anything behind.
+"""
+import time
+from contextlib import contextmanager
+
+import shortuuid
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import models as api_models
+from portfolio import models as portfolio_models
+
+factory = APIRequestFactory(SERVER_NAME="localhost")
+
+
+@contextmanager
+def rolled_back(response_cache=False):
+    # Benchmarks measure the database work, so cached responses are off
+    # unless asked for.
+    with override_settings(RESPONSE_CACHE_ENABLED=response_cache), transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def create_author(email=None):
+    email = email or f"bench-{shortuuid.uuid()[:8]}@example.com"
+    user = api_models.User.objects.create(email=email)
+    user.profile.author = True
+    user.profile.save()
+    return user
+
+
+def seed_posts(count, author=None, category=None, tags=2, likes=2, comments=2, replies=1):
+    """
+    Bulk-create ``count`` Active posts, each with ``tags`` tags, ``likes``
+    likers, ``comments`` top-level comments and ``replies`` replies per comment.
+    """
+    author = author or create_author()
+    category = category or api_models.Category.objects.create(title=f"Bench {shortuuid.uuid()[:8]}")
+    tag_objs = [
+        portfolio_models.Tag.objects.get_or_create(name=f"bench-tag-{i}")[0] for i in range(tags)
+    ]
+    likers = [create_author() for _ in range(likes)]
+
+    posts = api_models.Post.objects.bulk_create([
+        api_models.Post(
+            user=author,
+            profile=author.profile,
+            title=f"Bench post {i}",
+            description="Lorem ipsum dolor sit amet " * 10,
+            category=category,
+            status="Active",
+            slug=f"bench-post-{i}-{shortuuid.uuid()[:8]}",
+        )
+        for i in range(count)
+    ])
+
+    Post_tags = api_models.Post.tags.through
+    Post_likes = api_models.Post.likes.through
+    Post_tags.objects.bulk_create([
+        Post_tags(post_id=post.id, tag_id=tag.id) for post in posts for tag in tag_objs
+    ])
+    Post_likes.objects.bulk_create([
+        Post_likes(post_id=post.id, user_id=user.id) for post in posts for user in likers
+    ])
+
+    parents = api_models.Comment.objects.bulk_create([
+        api_models.Comment(post=post, name="Reader", email="reader@example.com", comment="Nice post")
+        for post in posts for _ in range(comments)
+    ])
+    api_models.Comment.objects.bulk_create([
+        api_models.Comment(post=parent.post, parent=parent, name="Author", email=author.email, comment="Thanks")
+        for parent in parents for _ in range(replies)
+    ])
+    return posts
+
+
+def call_view(view, method="get", path="/", data=None, user=None, **kwargs):
+    request = getattr(factory, method)(path, data, format="json" if method != "get" else None)
+    if user is not None:
+        force_authenticate(request, user=user)
+    response = view(request, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+def count_queries(func, *args, **kwargs):
+    with CaptureQueriesContext(connection) as ctx:
+        result = func(*args, **kwargs)
+    return len(ctx.captured_queries), result
+
+
+def timed(func, repeat=1):
+    """Run ``func`` ``repeat`` times and return the elapsed seconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
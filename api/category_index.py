@@ -0,0 +1,57 @@
+"""
+In-process cache of the category listing.
+
+Categories come back with their Active post count annotated in one query.
+The loaded rows are kept until a Post or Category is saved or deleted in
+this process, or for at most CATEGORY_INDEX_CACHE_TTL seconds so other
+workers pick up changes too.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+
+from api import models as api_models
+
+_lock = threading.Lock()
+_cached = None
+_loaded_at = 0.0
+_generation = 0
+
+
+def categories_with_post_counts():
+    return api_models.Category.objects.annotate(
+        post_count=Count("posts", filter=Q(posts__status="Active"))
+    ).order_by("id")
+
+
+def get_categories():
+    global _cached, _loaded_at
+
+    ttl = getattr(settings, "CATEGORY_INDEX_CACHE_TTL", 60)
+    with _lock:
+        if _cached is not None and time.monotonic() - _loaded_at < ttl:
+            return _cached
+        generation = _generation
+
+    categories = list(categories_with_post_counts())
+    with _lock:
+        # Don't keep rows loaded before an invalidation that raced with us.
+        if generation == _generation:
+            _cached, _loaded_at = categories, time.monotonic()
+    return categories
+
+
+def invalidate(*args, **kwargs):
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
+
+
+def connect():
+    for model in (api_models.Post, api_models.Category):
+        post_save.connect(invalidate, sender=model, dispatch_uid=f"category_index_{model.__name__}_saved")
+        post_delete.connect(invalidate, sender=model, dispatch_uid=f"category_index_{model.__name__}_deleted")
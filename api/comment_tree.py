@@ -0,0 +1,79 @@
+"""
+Comment threads assembled in memory.
+
+Comments are always loaded as one flat, ordered list and linked to their
+parents in Python, so a thread costs one query however many replies it has.
+Every comment gets a ``loaded_replies`` list that CommentSerializer and the
+comment views read instead of ``comment.replies``.
+"""
+from django.conf import settings
+
+from api import models as api_models
+
+ORDERING = ("-date", "-id")
+
+
+def build(comments, max_depth=None, max_replies=None):
+    """
+    Link a flat list of comments into a tree and return its roots.
+
+    Siblings keep the order of ``comments``. Replies deeper than ``max_depth``
+    levels below a root, and replies past the first ``max_replies`` of any
+    comment, are left out. ``None`` falls back to the COMMENT_TREE_MAX_DEPTH
+    and COMMENT_TREE_MAX_REPLIES settings, which default to no limit.
+    """
+    if max_depth is None:
+        max_depth = getattr(settings, "COMMENT_TREE_MAX_DEPTH", None)
+    if max_replies is None:
+        max_replies = getattr(settings, "COMMENT_TREE_MAX_REPLIES", None)
+
+    by_id = {}
+    for comment in comments:
+        comment.loaded_replies = []
+        by_id[comment.id] = comment
+
+    roots = []
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.loaded_replies.append(comment)
+
+    if max_depth is not None or max_replies is not None:
+        _prune(roots, 0, max_depth, max_replies)
+    return roots
+
+
+def _prune(comments, depth, max_depth, max_replies):
+    for comment in comments:
+        if max_depth is not None and depth >= max_depth:
+            comment.loaded_replies = []
+            continue
+        if max_replies is not None:
+            comment.loaded_replies = comment.loaded_replies[:max_replies]
+        _prune(comment.loaded_replies, depth + 1, max_depth, max_replies)
+
+
+def for_post(post, max_depth=None, max_replies=None):
+    """Top-level comments of ``post`` with their replies attached."""
+    comments = list(api_models.Comment.objects.filter(post=post).order_by(*ORDERING))
+    return build(comments, max_depth, max_replies)
+
+
+def attach_replies(comments, max_depth=None, max_replies=None):
+    """
+    Attach ``loaded_replies`` to an arbitrary page of comments, e.g. an
+    author's dashboard list, with one query over the posts they belong to.
+    """
+    if not comments:
+        return comments
+
+    post_ids = {comment.post_id for comment in comments}
+    thread = list(api_models.Comment.objects.filter(post_id__in=post_ids).order_by(*ORDERING))
+    build(thread, max_depth, max_replies)
+
+    loaded = {comment.id: comment.loaded_replies for comment in thread}
+    for comment in comments:
+        comment.loaded_replies = loaded.get(comment.id, [])
+    return comments
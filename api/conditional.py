@@ -0,0 +1,106 @@
+"""
+Conditional GET (ETag / Last-Modified) for content endpoints.
+
+Validators come from one small query per request, e.g. max(updated_at) and
+a row count, plus the response cache tag versions so changes to nested
+authors, categories and tags count too. Lists only get an ETag. A matching
+If-None-Match or If-Modified-Since gets a 304 before any serializer runs.
+ETags are weak: a post's body also carries its live view count, which does
+not change the content.
+"""
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Max
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from api import models as api_models
+from api import response_cache
+
+
+def make_etag(*parts):
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def queryset_validators(queryset, field, tags=()):
+    """
+    ETag for a list from ``Max(field)``, ``Count`` and the tag versions.
+
+    No Last-Modified: a delete or a row leaving the filter (a post set to
+    Draft) never moves the newest remaining ``field``, while the list's
+    tags are invalidated by both.
+    """
+    summary = queryset.order_by().aggregate(last_modified=Max(field), count=Count("pk"))
+    versions = response_cache.tag_versions(tags)
+    last_modified = summary["last_modified"]
+    etag = make_etag(last_modified and last_modified.isoformat(), summary["count"], sorted(versions.items()))
+    return etag, None
+
+
+class ConditionalGetMixin:
+    """
+    Views must define ``get_validators()``, returning ``(etag, last_modified)``;
+    either may be None. Returning None altogether skips the conditional check.
+    A view without it fails when its class is defined.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "get_validators", None)):
+            raise ImproperlyConfigured(f"{cls.__name__} uses ConditionalGetMixin without defining get_validators()")
+
+    def not_modified(self):
+        pass
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if response is not None:
+            self.not_modified()
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            if etag:
+                response["ETag"] = etag
+            if last_modified_ts is not None:
+                response["Last-Modified"] = http_date(last_modified_ts)
+        return response
+
+
+# Comments and likes are part of a post's representation, so they move
+# its updated_at as well.
+
+def touch_posts(post_ids):
+    if post_ids:
+        api_models.Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+
+
+def comment_changed(sender, instance, **kwargs):
+    touch_posts([instance.post_id])
+
+
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        touch_posts([instance.pk])
+    elif action == "pre_clear":
+        touch_posts(list(api_models.Post.objects.filter(likes=instance).values_list("pk", flat=True)))
+    else:
+        touch_posts(list(pk_set))
+
+
+def connect():
+    post_save.connect(comment_changed, sender=api_models.Comment, dispatch_uid="conditional_comment_saved")
+    post_delete.connect(comment_changed, sender=api_models.Comment, dispatch_uid="conditional_comment_deleted")
+    m2m_changed.connect(likes_changed, sender=api_models.Post.likes.through, dispatch_uid="conditional_likes_changed")
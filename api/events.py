@@ -0,0 +1,219 @@
+"""
+Live notification events for the author dashboard, as Server-Sent Events.
+
+Each open stream subscribes to its author on an in-process broker.
+Notifications written in this process are published as their transaction
+commits; those written by other processes (the run_jobs worker, other web
+workers) are picked up by one tailer task per process, which reads every
+notification changed since its last pass in a single query each
+NOTIFICATION_STREAM_POLL_INTERVAL seconds while anyone is connected.
+
+Event ids are the notification's ``updated_at`` in microseconds, so a
+client reconnecting with ``Last-Event-ID`` is first sent what it missed. A
+stream that falls too far behind is closed instead of dropping events; the
+browser reconnects and catches up the same way. Streams also end after
+NOTIFICATION_STREAM_MAX_AGE seconds: Django doesn't tell a streaming
+response that its client went away, so this is what frees the
+subscriptions of closed tabs. Streams need the ASGI application
+(backend/asgi.py).
+"""
+import asyncio
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from api import models as api_models
+from api import serializer as api_serializer
+
+PUBLISHED_MEMORY = 10000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Subscription:
+    def __init__(self, key, loop, maxsize):
+        self.key = key
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        # Runs on the subscriber's loop. After one drop every later event is
+        # dropped too, so resuming from the last delivered id loses nothing.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    """Thread-safe fan-out from any thread to asyncio subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, key, maxsize=100):
+        subscription = Subscription(key, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscriptions[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.key)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.key]
+
+    def keys(self):
+        with self._lock:
+            return list(self._subscriptions)
+
+    def publish(self, key, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's loop has closed.
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+_published_lock = threading.Lock()
+_published = OrderedDict()
+
+
+def event_id(notification):
+    return str(int(notification.updated_at.timestamp() * 1_000_000))
+
+
+def parse_event_id(value):
+    try:
+        return datetime.fromtimestamp(int(value) / 1_000_000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def notification_queryset():
+    return api_models.Notification.objects.select_related("post").only(
+        "id", "user_id", "type", "count", "seen", "date", "updated_at", "post__id", "post__title", "post__slug"
+    )
+
+
+def make_event(notification):
+    data = api_serializer.NotificationListSerializer(notification).data
+    return {"id": event_id(notification), "event": "notification", "data": json.dumps(data, cls=DjangoJSONEncoder)}
+
+
+def publish(notifications):
+    """Send each notification to its author's streams, once per version."""
+    for notification in notifications:
+        with _published_lock:
+            sent = _published.get(notification.pk)
+            if sent is not None and sent >= notification.updated_at:
+                continue
+            _published[notification.pk] = notification.updated_at
+            _published.move_to_end(notification.pk)
+            while len(_published) > PUBLISHED_MEMORY:
+                _published.popitem(last=False)
+        broker.publish(notification.user_id, make_event(notification))
+
+
+def publish_on_commit(notification_id, user_id):
+    """Called by api.notifications; free when the author isn't connected here."""
+    def send():
+        if user_id in broker.keys():
+            publish(notification_queryset().filter(pk=notification_id))
+    transaction.on_commit(send)
+
+
+def replay(user_id, since):
+    limit = _setting("NOTIFICATION_STREAM_REPLAY_LIMIT", 100)
+    notifications = notification_queryset().filter(user_id=user_id, updated_at__gt=since).order_by("updated_at", "id")
+    return [make_event(notification) for notification in notifications[:limit]]
+
+
+# Cross-process changes
+
+_tailer = None
+
+
+def _poll(cursor):
+    keys = broker.keys()
+    if not keys:
+        return cursor
+    # Re-read a few seconds back: a transaction may commit after a later one
+    # and still carry the earlier timestamp. publish() drops repeats.
+    overlap = timedelta(seconds=_setting("NOTIFICATION_STREAM_OVERLAP", 5))
+    changed = list(notification_queryset().filter(user_id__in=keys, updated_at__gt=cursor - overlap).order_by("updated_at", "id"))
+    publish(changed)
+    return max([cursor, *(notification.updated_at for notification in changed)])
+
+
+async def _tail():
+    global _tailer
+    cursor = timezone.now()
+    try:
+        while broker.keys():
+            await asyncio.sleep(_setting("NOTIFICATION_STREAM_POLL_INTERVAL", 1))
+            cursor = await sync_to_async(_poll)(cursor)
+    finally:
+        _tailer = None
+
+
+def _ensure_tailer():
+    global _tailer
+    if _tailer is None or _tailer.done():
+        _tailer = asyncio.get_running_loop().create_task(_tail())
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {event['data']}\n\n"
+
+
+async def stream(user_id, last_event_id=None):
+    """The text/event-stream body for ``user_id``'s notifications."""
+    subscription = broker.subscribe(user_id, maxsize=_setting("NOTIFICATION_STREAM_BUFFER", 100))
+    _ensure_tailer()
+    heartbeat = _setting("NOTIFICATION_STREAM_HEARTBEAT", 15)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _setting("NOTIFICATION_STREAM_MAX_AGE", 300)
+    try:
+        yield "retry: 3000\n\n"
+        since = parse_event_id(last_event_id)
+        if since is not None:
+            for event in await sync_to_async(replay)(user_id, since):
+                yield format_event(event)
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # The client reconnects after ``retry`` with its Last-Event-ID.
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                if loop.time() < deadline:
+                    yield ": heartbeat\n\n"
+                continue
+            yield format_event(event)
+            if subscription.overflowed and subscription.queue.empty():
+                return
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,148 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images.
+
+Each original gets one file per width in IMAGE_DERIVATIVE_WIDTHS and per
+format, stored under ``derivatives/`` next to the other media with
+predictable names, so serializers can list them without a lookup table.
+Images saved on a Post, Profile or ProjectUpload are resized by an
+"images.derivatives" job (api/jobs.py), never on the request thread; once
+the files exist the job moves ``updated_at`` and the response cache tags of
+everything that shows the image, so cached and conditional responses pick
+up the new ``image_variants``. The ``generate_image_derivatives`` command
+backfills existing media.
+"""
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from api import jobs
+from api import models as api_models
+from api import response_cache
+from portfolio import models as portfolio_models
+
+DEFAULT_WIDTHS = (320, 640, 1280)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DERIVATIVES_DIR = "derivatives"
+
+
+def widths():
+    return tuple(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", DEFAULT_WIDTHS))
+
+
+def variant_name(name, width, fmt):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(DERIVATIVES_DIR, directory, f"{stem}-{width}w.{'jpg' if fmt == 'jpeg' else fmt}")
+
+
+def _for_format(image, pil_format):
+    if pil_format == "JPEG":
+        if image.mode == "RGB":
+            return image
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            # JPEG has no alpha; flatten onto white.
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            return background
+        return image.convert("RGB")
+    return image if image.mode in ("RGB", "RGBA") else image.convert("RGBA")
+
+
+def generate(name, storage=default_storage, force=False):
+    """
+    Write every derivative of the image stored as ``name`` and return how many
+    files were written. Widths above the original are encoded at the original
+    size rather than upscaled, so every width always exists.
+    """
+    marker = variant_name(name, widths()[0], "webp")
+    if not force and storage.exists(marker):
+        return 0
+    if not storage.exists(name):
+        # e.g. the default avatar on a fresh checkout
+        return 0
+
+    with storage.open(name, "rb") as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+
+    targets = [(width, fmt) for width in widths() for fmt in FORMATS]
+    # The smallest webp goes last: its presence marks a complete set.
+    targets.sort(key=lambda target: variant_name(name, *target) == marker)
+    for width, fmt in targets:
+        pil_format, options = FORMATS[fmt]
+        resized = image.copy()
+        resized.thumbnail((width, resized.height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        _for_format(resized, pil_format).save(buffer, pil_format, **options)
+        target = variant_name(name, width, fmt)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(buffer.getvalue()))
+    return len(targets)
+
+
+def variants(file, request=None, storage=default_storage):
+    """
+    ``{"webp": {"320w": url, ...}, "jpeg": {...}}`` for an image field value,
+    or None until its derivatives exist.
+    """
+    if not file or not file.name:
+        return None
+    if not storage.exists(variant_name(file.name, widths()[0], "webp")):
+        return None
+
+    def url(name):
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return {
+        fmt: {f"{width}w": url(variant_name(file.name, width, fmt)) for width in widths()}
+        for fmt in FORMATS
+    }
+
+
+def refresh_owners(name):
+    """Mark the posts and projects showing the image ``name`` as changed."""
+    now = timezone.now()
+    # A profile picture is nested in each of its owner's posts.
+    posts = api_models.Post.objects.filter(Q(image=name) | Q(profile__image=name))
+    with transaction.atomic():
+        touched = list(posts.select_related("category").only("slug", "category__slug"))
+        api_models.Post.objects.filter(pk__in=[post.pk for post in touched]).update(updated_at=now)
+        projects = portfolio_models.ProjectUpload.objects.filter(image=name).update(updated_at=now)
+    tags = [tag for post in touched for tag in response_cache.post_tags(post)]
+    if projects:
+        tags.append("project-list")
+    response_cache.invalidate(*tags)
+
+
+@jobs.task("images.derivatives")
+def generate_derivatives(name):
+    if generate(name):
+        refresh_owners(name)
+
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    image = getattr(instance, "image", None)
+    if raw or not image or not image.name:
+        return
+    marker = variant_name(image.name, widths()[0], "webp")
+    if not default_storage.exists(marker) and default_storage.exists(image.name):
+        jobs.enqueue("images.derivatives", {"name": image.name})
+
+
+def connect():
+    for model in (api_models.Post, api_models.Profile, portfolio_models.ProjectUpload):
+        post_save.connect(image_saved, sender=model, dispatch_uid=f"images_{model.__name__}_saved")
@@ -0,0 +1,138 @@
+"""
+Database-backed background jobs.
+
+``enqueue()`` writes a ``Job`` row in the caller's transaction, so a job
+exists exactly when the change that asked for it was committed. The
+``run_jobs`` worker command claims ready jobs in batches: with ``SELECT ...
+FOR UPDATE SKIP LOCKED`` where the database has it, and on SQLite with one
+UPDATE statement that stamps the batch with a claim token, since SQLite
+runs writes one at a time. Failures are retried with exponential backoff
+until ``max_attempts``, and every attempt's duration is recorded on the row.
+
+Task functions register under a name with ``@task("name")`` and take the
+job's JSON payload as keyword arguments. They run outside any transaction,
+so slow work such as image resizing holds no lock; each task wraps just its
+own writes in a short ``transaction.atomic()``. With JOB_QUEUE_EAGER jobs run in
+process right after the enqueueing transaction commits, for development
+without a worker.
+"""
+import logging
+import random
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+Job = api_models.Job
+TASKS = {}
+
+
+def task(name):
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """Queue task ``name`` to run with ``payload`` as keyword arguments."""
+    if name not in TASKS:
+        raise LookupError(f"Unknown job {name!r}")
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or _setting("JOB_QUEUE_MAX_ATTEMPTS", 5),
+    )
+    if _setting("JOB_QUEUE_EAGER", False):
+        transaction.on_commit(lambda: [run(claimed) for claimed in _claim(Job.objects.filter(pk=job.pk), "eager")])
+    return job
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: doubling, capped, with jitter."""
+    base = _setting("JOB_QUEUE_BACKOFF_BASE", 2)
+    delay = min(base * 2 ** (attempts - 1), _setting("JOB_QUEUE_BACKOFF_MAX", 600))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim(ready, worker):
+    token = f"{worker}:{uuid.uuid4().hex[:12]}"
+    changes = dict(status=Job.RUNNING, claimed_by=token, claimed_at=timezone.now(), attempts=F("attempts") + 1)
+    queued = Job.objects.filter(status=Job.QUEUED)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list("pk", flat=True))
+            if ids:
+                queued.filter(pk__in=ids).update(**changes)
+    else:
+        # A single UPDATE ... WHERE id IN (SELECT ... LIMIT n): SQLite takes
+        # the write lock for the whole statement, waiting out the busy
+        # timeout, so two workers can never claim the same row. A SELECT
+        # followed by an UPDATE would fail upgrading its read lock instead.
+        queued.filter(pk__in=ready.values("pk")).update(**changes)
+    return list(Job.objects.filter(claimed_by=token, status=Job.RUNNING).order_by("run_after", "id"))
+
+
+def claim(worker, limit=10):
+    """Mark up to ``limit`` ready jobs as running for ``worker`` and return them."""
+    requeue_stale()
+    ready = Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now()).order_by("run_after", "id")
+    return _claim(ready[:limit], worker)
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run, failing those out of attempts."""
+    cutoff = timezone.now() - timedelta(seconds=_setting("JOB_QUEUE_CLAIM_TIMEOUT", 300))
+    stale = Job.objects.filter(status=Job.RUNNING, claimed_at__lt=cutoff)
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, finished_at=timezone.now(), last_error="Worker stopped responding",
+    )
+    stale.update(status=Job.QUEUED, claimed_by="")
+
+
+def run(job):
+    """Run a claimed job once and record its outcome and timing."""
+    start = time.perf_counter()
+    try:
+        func = TASKS.get(job.name)
+        if func is None:
+            raise LookupError(f"Unknown job {job.name!r}")
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=backoff(job.attempts))
+        logger.warning("Job %s (%s) failed on attempt %d", job.pk, job.name, job.attempts, exc_info=True)
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+        job.last_error = ""
+    job.duration = time.perf_counter() - start
+    job.save(update_fields=["status", "run_after", "finished_at", "last_error", "duration"])
+    return job
+
+
+def prune(days=None):
+    """Delete finished jobs older than JOB_QUEUE_KEEP_DONE_DAYS."""
+    if days is None:
+        days = _setting("JOB_QUEUE_KEEP_DONE_DAYS", 1)
+    cutoff = timezone.now() - timedelta(days=days)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
@@ -0,0 +1,83 @@
+"""
+Post likes and the denormalized ``Post.like_count``.
+
+``toggle()`` flips one reader's like with a single delete on the indexed
+(post, user) pair of the through table, falling back to an insert when
+nothing was there, so its cost doesn't grow with the number of likers. It
+sends the same ``m2m_changed`` signals as ``post.likes.add()/remove()``;
+``likes_changed`` below moves ``like_count`` with ``F()`` for those and any
+other change to the likes, in the same transaction.
+
+``remove()`` reports every id it was given, liked or not, so
+``narrow_removed`` first cuts ``pk_set`` down to the likes that exist; the
+counters here and in api.stats then only see real removals. ``toggle()``
+already knows what it removed and marks its signals ``confirmed``.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+
+from api import models as api_models
+
+Post = api_models.Post
+Like = Post.likes.through
+
+
+def toggle(post_id, user_id):
+    """Like ``post_id`` for ``user_id``, or unlike it; True if it is now liked."""
+    post = Post.objects.select_related("category").only("id", "user_id", "slug", "category__slug").get(pk=post_id)
+    using = router.db_for_write(Like, instance=post)
+    with transaction.atomic(using=using, savepoint=False):
+        removed = Like.objects.filter(post_id=post.pk, user_id=user_id).delete()[0]
+        if not removed:
+            try:
+                with transaction.atomic(using=using):
+                    Like.objects.create(post_id=post.pk, user_id=user_id)
+            except IntegrityError:
+                # A concurrent request liked it first; anything else isn't ours to hide.
+                if Like.objects.using(using).filter(post_id=post.pk, user_id=user_id).exists():
+                    return True
+                raise
+        action = "remove" if removed else "add"
+        for when in ("pre", "post"):
+            m2m_changed.send(
+                sender=Like, instance=post, action=f"{when}_{action}", reverse=False,
+                model=api_models.User, pk_set={user_id}, using=using, confirmed=True,
+            )
+    return not removed
+
+
+def narrow_removed(sender, instance, action, reverse, pk_set, using, confirmed=False, **kwargs):
+    if action != "pre_remove" or confirmed or not pk_set:
+        return
+    if reverse:
+        liked = Like.objects.using(using).filter(user_id=instance.pk, post_id__in=pk_set).values_list("post_id", flat=True)
+    else:
+        liked = Like.objects.using(using).filter(post_id=instance.pk, user_id__in=pk_set).values_list("user_id", flat=True)
+    # The same set object reaches the delete and the post_remove receivers.
+    pk_set.intersection_update(liked)
+
+
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if action == "pre_clear":
+        if reverse:
+            Post.objects.filter(likes=instance).update(like_count=F("like_count") - 1)
+        else:
+            Post.objects.filter(pk=instance.pk).update(like_count=0)
+        return
+
+    delta = len(pk_set) if action == "post_add" else -len(pk_set)
+    if not delta:
+        return
+    if reverse:
+        # user.likes_user.add(...): ``pk_set`` holds post ids
+        Post.objects.filter(pk__in=pk_set).update(like_count=F("like_count") + (1 if delta > 0 else -1))
+    else:
+        Post.objects.filter(pk=instance.pk).update(like_count=F("like_count") + delta)
+
+
+def connect():
+    m2m_changed.connect(narrow_removed, sender=Like, dispatch_uid="likes_narrow_removed")
+    m2m_changed.connect(likes_changed, sender=Like, dispatch_uid="likes_like_count")
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks, category_index
+from api import models as api_models
+from api import views as api_views
+
+
+class Command(BaseCommand):
+    help = "Count the queries the category listing runs as the number of categories grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+        parser.add_argument("--posts-per-category", type=int, default=3)
+
+    def handle(self, *args, **options):
+        view = api_views.CategoryListAPIView.as_view()
+        cold_counts = []
+
+        for size in options["sizes"]:
+            with benchmarks.rolled_back():
+                author = benchmarks.create_author()
+                categories = api_models.Category.objects.bulk_create([
+                    api_models.Category(title=f"Bench category {i}", slug=f"bench-category-{size}-{i}")
+                    for i in range(size)
+                ])
+                for category in categories:
+                    benchmarks.seed_posts(
+                        options["posts_per_category"], author=author, category=category,
+                        tags=0, likes=0, comments=0,
+                    )
+
+                category_index.invalidate()
+                cold, response = benchmarks.count_queries(benchmarks.call_view, view)
+                warm, _response = benchmarks.count_queries(benchmarks.call_view, view)
+                seconds = benchmarks.timed(lambda: benchmarks.call_view(view), repeat=20)
+                category_index.invalidate()
+
+                counts = {row["post_count"] for row in response.data if row["slug"].startswith(f"bench-category-{size}-")}
+                if counts != {options["posts_per_category"]}:
+                    raise CommandError(f"Unexpected post counts {counts}")
+                cold_counts.append(cold)
+                self.stdout.write(
+                    f"categories={size:<6} cold queries={cold:<3} cached queries={warm:<3} "
+                    f"cached time={seconds / 20 * 1000:.2f}ms"
+                )
+
+        if len(set(cold_counts)) != 1:
+            raise CommandError(f"Query count grows with the number of categories {cold_counts}")
+        self.stdout.write(self.style.SUCCESS("Query count is constant across sizes."))
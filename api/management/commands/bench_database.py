@@ -0,0 +1,180 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import shortuuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api import models as api_models
+
+# Environment overrides per profile (see backend/settings.py)
+SQLITE_PROFILES = {
+    "sqlite, stock": {"SQLITE_TUNING": "False", "DATABASE_CONN_MAX_AGE": "0"},
+    "sqlite, WAL + persistent": {"SQLITE_TUNING": "True", "DATABASE_CONN_MAX_AGE": "600"},
+}
+POSTGRES_PROFILES = {
+    "postgres, per request": {"DATABASE_CONN_MAX_AGE": "0"},
+    "postgres, persistent": {"DATABASE_CONN_MAX_AGE": "600"},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the API from gunicorn with several workers and measure throughput of mixed post reads and "
+        "like toggles, per database profile. SQLite profiles use a scratch file; pass --database-url to add "
+        "PostgreSQL profiles (its tables are written to, so use a scratch database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="gunicorn worker processes.")
+        parser.add_argument("--clients", type=int, default=16, help="Concurrent client connections.")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds of load per profile.")
+        parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of requests that toggle a like.")
+        parser.add_argument("--database-url", help="A scratch PostgreSQL database to benchmark as well.")
+        parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            return self.seed()
+
+        runs = []
+        with tempfile.TemporaryDirectory() as scratch:
+            for index, (label, overrides) in enumerate(SQLITE_PROFILES.items()):
+                # A fresh file each: WAL mode, once set, sticks to the database.
+                url = f"sqlite:///{os.path.join(scratch, f'bench-{index}.sqlite3')}"
+                runs.append((label, url, overrides, True))
+            if options["database_url"]:
+                for first, (label, overrides) in enumerate(POSTGRES_PROFILES.items()):
+                    runs.append((label, options["database_url"], overrides, first == 0))
+
+            self.stdout.write(
+                f"{options['workers']} workers, {options['clients']} clients, "
+                f"{options['write_ratio']:.0%} writes, {options['duration']:.0f}s per profile"
+            )
+            for label, url, overrides, prepare in runs:
+                env = {
+                    **os.environ, **overrides, "DATABASE_URL": url,
+                    "RESPONSE_CACHE_ENABLED": "False", "JOB_QUEUE_EAGER": "False",
+                }
+                if prepare:
+                    self.manage(env, "migrate", "-v0")
+                    seed = json.loads(self.manage(env, "bench_database", "--seed"))
+                result = self.serve_and_drive(env, seed, options)
+                self.stdout.write(
+                    f"{label:26} {result['rps']:8.1f} req/s  "
+                    f"p50={result['p50']:6.1f}ms p95={result['p95']:6.1f}ms  errors={result['errors']}"
+                )
+
+    def manage(self, env, *args):
+        process = subprocess.run(
+            [sys.executable, "manage.py", *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise CommandError(f"manage.py {' '.join(args)} failed:\n{process.stderr}")
+        # settings.py prints a banner line first
+        return process.stdout.strip().splitlines()[-1] if process.stdout.strip() else ""
+
+    def seed(self):
+        posts = benchmarks.seed_posts(50, likes=0, comments=2, replies=1)
+        prefix = shortuuid.uuid()[:8]
+        readers = api_models.User.objects.bulk_create([
+            api_models.User(email=f"reader-{prefix}-{i}@example.com", username=f"reader-{prefix}-{i}")
+            for i in range(500)
+        ])
+        self.stdout.write(json.dumps({
+            "slugs": [post.slug for post in posts],
+            "post_ids": [post.id for post in posts],
+            "reader_ids": [reader.id for reader in readers],
+        }))
+
+    def serve_and_drive(self, env, seed, options):
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "backend.wsgi:application",
+             "--workers", str(options["workers"]), "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_until_up(port, server)
+            return self.drive(port, seed, options)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def wait_until_up(self, port, server):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                conn.request("GET", "/")
+                conn.getresponse().read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("gunicorn did not start")
+
+    def drive(self, port, seed, options):
+        deadline = time.monotonic() + options["duration"]
+        lock = threading.Lock()
+        latencies = []
+        errors = [0]
+
+        def client(number):
+            rng = random.Random(number)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            timings = []
+            failed = 0
+            while time.monotonic() < deadline:
+                if rng.random() < options["write_ratio"]:
+                    body = json.dumps({"user_id": rng.choice(seed["reader_ids"]), "post_id": rng.choice(seed["post_ids"])})
+                    request = ("POST", "/api/v1/post/like-post/", body, {"Content-Type": "application/json"})
+                else:
+                    request = ("GET", f"/api/v1/post/detail/{rng.choice(seed['slugs'])}/", None, {})
+                start = time.perf_counter()
+                try:
+                    conn.request(*request)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                    ok = False
+                timings.append(time.perf_counter() - start)
+                failed += not ok
+            with lock:
+                latencies.extend(timings)
+                errors[0] += failed
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options["clients"]) as pool:
+            list(pool.map(client, range(options["clients"])))
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        count = len(latencies) or 1
+        return {
+            "rps": len(latencies) / elapsed,
+            "p50": latencies[count // 2] * 1000 if latencies else 0,
+            "p95": latencies[min(count - 1, int(count * 0.95))] * 1000 if latencies else 0,
+            "errors": errors[0],
+        }
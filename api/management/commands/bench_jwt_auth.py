@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api import authentication
+from api import benchmarks
+from api import serializer as api_serializer
+
+
+class WhoAmIView(APIView):
+    # What most authenticated endpoints need from the user: who and whether allowed.
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"id": request.user.pk, "email": request.user.email, "staff": request.user.is_staff})
+
+
+class Command(BaseCommand):
+    help = "Compare authenticated request throughput with a User query per request against claims-based users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+
+        with benchmarks.rolled_back():
+            user = benchmarks.create_author()
+            token = api_serializer.MyTokenObtainPairSerializer.get_token(user).access_token
+            header = f"Bearer {token}"
+
+            def call(view):
+                response = view(benchmarks.factory.get("/", HTTP_AUTHORIZATION=header))
+                response.render()
+                if response.status_code != 200:
+                    raise CommandError(f"Expected 200, got {response.status_code}: {response.content!r}")
+
+            for label, auth_class in (
+                ("User query", JWTAuthentication),
+                ("token claims", authentication.ClaimsJWTAuthentication),
+            ):
+                view = WhoAmIView.as_view(authentication_classes=[auth_class])
+                call(view)
+                queries, _result = benchmarks.count_queries(call, view)
+                seconds = benchmarks.timed(lambda: call(view), repeat=total)
+                self.stdout.write(f"{label:13} {total / seconds:8.1f} req/s ({queries} queries per request)")
@@ -0,0 +1,66 @@
+import shortuuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import benchmarks
+from api import jobs
+from api import models as api_models
+from api import views as api_views
+
+
+class LegacyLikePostAPIView(api_views.LikePostAPIView):
+    # The pre-like_count behaviour: every liker loaded to test membership.
+    def post(self, request):
+        user = api_models.User.objects.get(id=request.data["user_id"])
+        post = api_models.Post.objects.get(id=request.data["post_id"])
+        if user in post.likes.all():
+            post.likes.remove(user)
+            return api_views.Response({"message": "Post Disliked"})
+        with transaction.atomic():
+            post.likes.add(user)
+            jobs.enqueue("notifications.create", {"post_id": post.id, "type": "Like"})
+        return api_views.Response({"message": "Post Liked"}, status=201)
+
+
+class Command(BaseCommand):
+    help = "Compare like/unlike throughput on a heavily liked post, loading every liker against the indexed toggle."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--likes", type=int, default=100000)
+        parser.add_argument("--toggles", type=int, default=1000)
+        parser.add_argument("--legacy-toggles", type=int, default=20)
+
+    def handle(self, *args, **options):
+        likes = options["likes"]
+
+        with benchmarks.rolled_back():
+            post = benchmarks.seed_posts(1, tags=0, likes=0, comments=0, replies=0)[0]
+            prefix = shortuuid.uuid()[:8]
+            # Plain rows: likers need no profile.
+            likers = api_models.User.objects.bulk_create(
+                [api_models.User(email=f"liker-{prefix}-{i}@example.com", username=f"liker-{prefix}-{i}") for i in range(likes)],
+                batch_size=5000,
+            )
+            Like = api_models.Post.likes.through
+            Like.objects.bulk_create([Like(post_id=post.id, user_id=user.id) for user in likers], batch_size=5000)
+            api_models.Post.objects.filter(id=post.id).update(like_count=likes)
+            reader = benchmarks.create_author()
+            data = {"user_id": reader.id, "post_id": post.id}
+            self.stdout.write(f"Post with {likes} likes")
+
+            for label, view, repeat in (
+                ("load all likers", LegacyLikePostAPIView.as_view(), options["legacy_toggles"]),
+                ("indexed toggle", api_views.LikePostAPIView.as_view(), options["toggles"]),
+            ):
+                queries, _response = benchmarks.count_queries(benchmarks.call_view, view, "post", data=data)
+                seconds = benchmarks.timed(lambda: benchmarks.call_view(view, "post", data=data), repeat=repeat)
+                self.stdout.write(f"{label:16} {repeat / seconds:8.1f} toggles/s ({queries} queries to like)")
+                # Leave the reader's like as it started.
+                if repeat % 2 == 0:
+                    benchmarks.call_view(view, "post", data=data)
+
+            post.refresh_from_db(fields=["like_count"])
+            actual = Like.objects.filter(post_id=post.id).count()
+            if post.like_count != actual:
+                raise CommandError(f"like_count is {post.like_count} but the post has {actual} likes")
+            self.stdout.write(self.style.SUCCESS(f"like_count matches the {actual} likes."))
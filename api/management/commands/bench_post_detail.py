@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api import models as api_models
+from api import views as api_views
+from api.view_counter import ViewCounter
+
+
+class LegacyPostDetailAPIView(api_views.PostDetailAPIView):
+    # The pre-write-behind behaviour: a full-row save on every read.
+    def get_object(self):
+        post = api_models.Post.objects.get(slug=self.kwargs["slug"], status="Active")
+        post.view += 1
+        post.save()
+        return post
+
+
+class Command(BaseCommand):
+    help = "Compare post detail throughput with per-request saves against the buffered view counter."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+
+        with benchmarks.rolled_back():
+            post = benchmarks.seed_posts(1)[0]
+            legacy = LegacyPostDetailAPIView.as_view()
+            buffered = api_views.PostDetailAPIView.as_view()
+
+            seconds = benchmarks.timed(lambda: benchmarks.call_view(legacy, slug=post.slug), repeat=total)
+            self.stdout.write(f"save() per request   {total / seconds:8.1f} req/s")
+
+            api_models.Post.objects.filter(id=post.id).update(view=0)
+            counter = ViewCounter(flush_interval=3600, max_pending=0)
+            with mock.patch.object(api_views, "view_counter", counter):
+                seconds = benchmarks.timed(lambda: benchmarks.call_view(buffered, slug=post.slug), repeat=total)
+                flush_seconds = benchmarks.timed(counter.flush)
+            self.stdout.write(f"buffered counter     {total / seconds:8.1f} req/s (flush took {flush_seconds * 1000:.2f}ms)")
+
+            post.refresh_from_db(fields=["view"])
+            if post.view != total:
+                raise CommandError(f"Expected {total} views after flush, found {post.view}")
+            self.stdout.write(self.style.SUCCESS(f"All {total} views were written back."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api import views as api_views
+
+
+class Command(BaseCommand):
+    help = "Count the queries the public/dashboard post list endpoints run as the number of posts grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+
+    def handle(self, *args, **options):
+        endpoints = [
+            ("post/lists/", api_views.PostListAPIView.as_view(), lambda posts: {}),
+            (
+                "post/category/posts/<slug>/",
+                api_views.PostCategoryListAPIView.as_view(),
+                lambda posts: {"category_slug": posts[0].category.slug},
+            ),
+            (
+                "author/dashboard/post-list/<id>/",
+                api_views.DashboardPostLists.as_view(),
+                lambda posts: {"user_id": posts[0].user_id},
+            ),
+        ]
+
+        results = {name: [] for name, _view, _kwargs in endpoints}
+        for size in options["sizes"]:
+            with benchmarks.rolled_back():
+                posts = benchmarks.seed_posts(size)
+                for name, view, kwargs in endpoints:
+                    queries, response = benchmarks.count_queries(benchmarks.call_view, view, **kwargs(posts))
+                    if response.status_code != 200:
+                        raise CommandError(f"{name} returned {response.status_code}")
+                    seconds = benchmarks.timed(lambda: benchmarks.call_view(view, **kwargs(posts)))
+                    results[name].append(queries)
+                    self.stdout.write(f"{name:<36} posts={size:<6} queries={queries:<4} time={seconds * 1000:.1f}ms")
+
+        for name, counts in results.items():
+            if len(set(counts)) != 1:
+                raise CommandError(f"{name}: query count grows with the number of posts {counts}")
+        self.stdout.write(self.style.SUCCESS("Query counts are constant across sizes."))
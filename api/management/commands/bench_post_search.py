@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api import search as api_search
+from api import views as api_views
+
+
+class Command(BaseCommand):
+    help = "Time post/search/ against a seeded full-text index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        view = api_views.PostSearchAPIView.as_view()
+        count = options["posts"]
+        # Every bench post matches "lorem ipsum", one matches "post <n>".
+        queries = ["lorem ipsum", f"bench post {count // 2}", "bench-tag-1", "nomatchanywhere"]
+
+        with benchmarks.rolled_back():
+            start = time.perf_counter()
+            benchmarks.seed_posts(count, tags=2, likes=0, comments=0, replies=0)
+            seeded = time.perf_counter() - start
+
+            start = time.perf_counter()
+            indexed = api_search.post_index.rebuild()
+            self.stdout.write(
+                f"seeded {count} posts in {seeded:.1f}s, indexed {indexed} in {time.perf_counter() - start:.1f}s"
+            )
+
+            for query in queries:
+                path = f"/?q={query}"
+                queries_run, response = benchmarks.count_queries(benchmarks.call_view, view, path=path)
+                if response.status_code != 200:
+                    raise CommandError(f"{query!r} returned {response.status_code}")
+                samples = []
+                for _ in range(options["repeat"]):
+                    samples.append(benchmarks.timed(lambda: benchmarks.call_view(view, path=path)))
+                samples.sort()
+                self.stdout.write(
+                    f"q={query!r:<22} results={len(response.data['results']):<3} queries={queries_run:<3} "
+                    f"p50={statistics.median(samples) * 1000:.2f}ms "
+                    f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:.2f}ms"
+                )
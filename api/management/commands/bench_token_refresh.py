@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import shortuuid
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from api import benchmarks
+from api import token_blacklist
+
+
+class Command(BaseCommand):
+    help = "Time token refreshes against a large blacklist, with and without the in-memory filter, then prune it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=200000, help="Blacklisted tokens to seed, half of them expired.")
+        parser.add_argument("--refreshes", type=int, default=300)
+
+    def handle(self, *args, **options):
+        count = options["tokens"]
+        refreshes = options["refreshes"]
+
+        with benchmarks.rolled_back():
+            user = benchmarks.create_author()
+            now = aware_utcnow()
+            prefix = shortuuid.uuid()[:8]
+            outstanding = OutstandingToken.objects.bulk_create([
+                OutstandingToken(
+                    user=user, jti=f"{prefix}-{i}", token="-", created_at=now,
+                    expires_at=now + timedelta(days=-1 if i % 2 else 30),
+                )
+                for i in range(count)
+            ], batch_size=5000)
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in outstanding], batch_size=5000)
+            BlacklistedToken.objects.update(blacklisted_at=now - timedelta(days=1))
+            self.stdout.write(f"{count} blacklisted tokens, {count // 2} expired")
+
+            token_blacklist.blacklist_filter.reset()
+            for label, serializer_class in (
+                ("table lookup", jwt_serializers.TokenRefreshSerializer),
+                ("bloom filter", token_blacklist.TokenRefreshSerializer),
+            ):
+                view = TokenRefreshView.as_view(serializer_class=serializer_class)
+                refresh = str(token_blacklist.RefreshToken.for_user(user))
+
+                def rotate():
+                    nonlocal refresh
+                    response = benchmarks.call_view(view, "post", data={"refresh": refresh})
+                    if response.status_code != 200:
+                        raise CommandError(f"Refresh failed: {response.content!r}")
+                    refresh = response.data["refresh"]
+
+                rotate()
+                seconds = benchmarks.timed(rotate, repeat=refreshes)
+                self.stdout.write(f"{label:13} {seconds / refreshes * 1000:7.2f}ms per refresh")
+
+            # The blacklist check alone, for a token that isn't blacklisted
+            checks = refreshes * 10
+            seconds = benchmarks.timed(lambda: BlacklistedToken.objects.filter(token__jti="fresh").exists(), repeat=checks)
+            self.stdout.write(f"{'table check':13} {seconds / checks * 1e6:7.1f}us per check")
+            seconds = benchmarks.timed(lambda: token_blacklist.blacklist_filter.contains("fresh"), repeat=checks)
+            self.stdout.write(f"{'filter check':13} {seconds / checks * 1e6:7.1f}us per check")
+
+            # A rotated-away token must still be refused.
+            used = str(token_blacklist.RefreshToken.for_user(user))
+            view = TokenRefreshView.as_view(serializer_class=token_blacklist.TokenRefreshSerializer)
+            benchmarks.call_view(view, "post", data={"refresh": used})
+            if benchmarks.call_view(view, "post", data={"refresh": used}).status_code != 401:
+                raise CommandError("A blacklisted refresh token was accepted")
+
+            removed = []
+            seconds = benchmarks.timed(lambda: removed.append(token_blacklist.prune()))
+            self.stdout.write(f"pruned {removed[0]} expired tokens in {seconds:.2f}s")
+            self.stdout.write(self.style.SUCCESS(f"{OutstandingToken.objects.count()} tokens left."))
@@ -0,0 +1,152 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import benchmarks
+from api import models as api_models
+from api.view_counter import view_counter
+from portfolio import models as portfolio_models
+from visitor import models as visitor_models
+from visitor.ingest import visit_buffer
+
+# Tables an endpoint reads whole by design
+ALLOWED_SCANS = frozenset()
+EXPLAINED_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Call each API endpoint against seeded rows, EXPLAIN every query it runs and fail if any of them "
+        "scans a whole table instead of using an index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=50)
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every query.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"Query plans can't be read on {connection.vendor}")
+
+        failures = []
+        with benchmarks.rolled_back():
+            if connection.vendor == "postgresql":
+                # Small seeded tables are cheaper to scan; ask whether an index could serve instead.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for label, method, path, data, auth in self.endpoints(options["posts"]):
+                client = APIClient(SERVER_NAME="localhost")
+                if auth:
+                    client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth}")
+                with CaptureQueriesContext(connection) as ctx:
+                    response = getattr(client, method)(path, data, format="json" if method != "get" else None)
+                    # Write-behind buffers flush here, inside the rolled back transaction
+                    view_counter.flush()
+                    visit_buffer.flush()
+                if response.status_code >= 400:
+                    raise CommandError(f"{label}: {method.upper()} {path} returned {response.status_code}")
+
+                scans = []
+                for query in ctx.captured_queries:
+                    if not EXPLAINED_RE.match(query["sql"]):
+                        continue
+                    plan, tables = self.explain(query["sql"])
+                    if options["verbose_plans"]:
+                        self.stdout.write(f"  {query['sql']}\n    {plan}")
+                    scans.extend((table, query["sql"]) for table in tables if table not in ALLOWED_SCANS)
+
+                self.stdout.write(f"{label:32} {len(ctx.captured_queries):3} queries  {len(scans)} full scans")
+                for table, sql in scans:
+                    self.stdout.write(self.style.ERROR(f"  full scan of {table}: {sql}"))
+                failures.extend(scans)
+
+        if failures:
+            raise CommandError(f"{len(failures)} queries scan a whole table")
+        self.stdout.write(self.style.SUCCESS("Every query is served by an index."))
+
+    def explain(self, sql):
+        """The plan of ``sql`` as text and the tables it scans in full."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                details = [row[-1] for row in cursor.fetchall()]
+                tables = [match.group(1) for match in map(SQLITE_SCAN_RE.match, details) if match]
+                return "; ".join(details), tables
+
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes, tables = [plan[0]["Plan"]], []
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan":
+                    tables.append(node["Relation Name"])
+                nodes.extend(node.get("Plans", []))
+            return json.dumps(plan), tables
+
+    def endpoints(self, count):
+        """Seed rows and return (label, method, path, data, access token) for each endpoint."""
+        author = benchmarks.create_author()
+        author.set_password("Xk2!vq9#Lm4z")
+        author.is_staff = True
+        author.save()
+        reader = benchmarks.create_author()
+        posts = benchmarks.seed_posts(count, author=author)
+        post = posts[0]
+        api_models.Bookmark.objects.bulk_create([api_models.Bookmark(user=reader, post=p) for p in posts[:10]])
+        api_models.Notification.objects.bulk_create([
+            api_models.Notification(user=author, post=p, type="Like") for p in posts[:10]
+        ])
+        notification = api_models.Notification.objects.filter(user=author).first()
+        comment = api_models.Comment.objects.filter(post=post, parent=None).first()
+        portfolio_models.ProjectUpload.objects.create(
+            author=author, title="Plan check project", live_link="-", github_link="-", desc="-",
+        )
+        portfolio_models.ContactMessage.objects.create(
+            first_name="Plan", last_name="Check", email="plan@example.com", phone_number="+14155550100",
+            role="Client", message="Hello",
+        )
+        visitor_models.Visitor.objects.create(ip="203.0.113.7")
+
+        refresh = RefreshToken.for_user(author)
+        token = str(refresh.access_token)
+        ids = ",".join(str(p.id) for p in posts[:20])
+        return [
+            ("login", "post", "/api/v1/user/token/", {"email": author.email, "password": "Xk2!vq9#Lm4z"}, None),
+            ("token refresh", "post", "/api/v1/user/token/refresh/", {"refresh": str(refresh)}, None),
+            ("profile", "get", f"/api/v1/user/profile/{author.id}/", None, None),
+            ("category list", "get", "/api/v1/post/category/list/", None, None),
+            ("category posts", "get", f"/api/v1/post/category/posts/{post.category.slug}/", None, None),
+            ("post list", "get", "/api/v1/post/lists/", None, None),
+            ("post list, viewer state", "get", "/api/v1/post/lists/?viewer_state=1", None, token),
+            ("post search", "get", "/api/v1/post/search/?q=bench", None, None),
+            ("viewer state", "get", f"/api/v1/post/viewer-state/?ids={ids}", None, token),
+            ("post detail", "get", f"/api/v1/post/detail/{post.slug}/", None, None),
+            ("like", "post", "/api/v1/post/like-post/", {"user_id": reader.id, "post_id": post.id}, None),
+            ("bookmark", "post", "/api/v1/post/bookmark-post/", {"user_id": reader.id, "post_id": posts[-1].id}, None),
+            ("comment", "post", "/api/v1/post/comment-post/",
+             {"post_id": post.id, "name": "Reader", "email": "reader@example.com", "comment": "Hi"}, None),
+            ("dashboard stats", "get", f"/api/v1/author/dashboard/stats/{author.id}/", None, None),
+            ("dashboard posts", "get", f"/api/v1/author/dashboard/post-list/{author.id}/", None, None),
+            ("dashboard comments", "get", f"/api/v1/author/dashboard/comment-list/{author.id}/", None, None),
+            ("dashboard notifications", "get", f"/api/v1/author/dashboard/notification-list/{author.id}/", None, None),
+            ("unread count", "get", f"/api/v1/author/dashboard/notification-unread-count/{author.id}/", None, None),
+            ("mark seen", "post", "/api/v1/author/dashboard/notification-mark-seen/", {"notification_id": notification.id}, None),
+            ("clear notifications", "post", "/api/v1/author/clear-notifications/", {"user_id": author.id}, None),
+            ("reply", "post", "/api/v1/author/dashboard/reply-comment/", {"comment_id": comment.id, "reply": "Thanks"}, None),
+            ("dashboard post detail", "get", f"/api/v1/author/dashboard/post-detail/{author.id}/{post.id}/", None, None),
+            ("tags", "get", "/api/v1/tags/", None, None),
+            ("projects", "get", "/api/portfolio/projects/", None, None),
+            ("published projects", "get", "/api/portfolio/projects/view/", None, None),
+            ("contact messages", "get", "/api/portfolio/contact/messages/", None, token),
+            ("add visitor", "post", "/api/visitor/add-visitor/", {"ip": "203.0.113.7", "userAgent": "check"}, None),
+            ("visitor stats", "get", "/api/visitor/visitor-stats/", None, None),
+            ("visitors", "get", "/api/visitor/visitors/", None, None),
+            ("visitor timeseries", "get", "/api/visitor/timeseries/", None, None),
+        ]
@@ -0,0 +1,65 @@
+import re
+
+import shortuuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import benchmarks
+from api import models as api_models
+from api import views as api_views
+
+USER_TABLES = ("api_user", "api_profile")
+WRITE_RE = re.compile(r'^(INSERT) INTO "(\w+)"|^(UPDATE) "(\w+)"|^(DELETE) FROM "(\w+)"')
+
+
+def writes(queries):
+    """(statement, table) for each INSERT/UPDATE/DELETE on the user or profile table."""
+    found = []
+    for query in queries:
+        match = WRITE_RE.match(query["sql"])
+        if match:
+            verb, table = [group for group in match.groups() if group]
+            if table in USER_TABLES:
+                found.append((verb, table))
+    return found
+
+
+class Command(BaseCommand):
+    help = "Count the queries and user/profile writes of registration and of user saves; fail on regressions."
+
+    def handle(self, *args, **options):
+        with benchmarks.rolled_back():
+            email = f"register-{shortuuid.uuid()[:8]}@example.com"
+            data = {"full_name": "New Reader", "email": email, "password": "Xk2!vq9#Lm4z", "password2": "Xk2!vq9#Lm4z"}
+            with CaptureQueriesContext(connection) as ctx:
+                response = benchmarks.call_view(api_views.RegisterView.as_view(), "post", data=data)
+            if response.status_code != 201:
+                raise CommandError(f"Registration failed: {response.content!r}")
+            self.report("registration", ctx, expected=[("INSERT", "api_user"), ("INSERT", "api_profile")])
+
+            user = api_models.User.objects.get(email=email)
+            if user.username != email.split("@")[0] or user.profile.full_name != "New Reader":
+                raise CommandError("Registration did not fill in the username and profile name")
+
+            with CaptureQueriesContext(connection) as ctx:
+                user.save(update_fields=["last_login"])
+            self.report("user save, name unchanged", ctx, expected=[("UPDATE", "api_user")])
+
+            user.full_name = "Renamed Reader"
+            with CaptureQueriesContext(connection) as ctx:
+                user.save()
+            self.report("user save, name changed", ctx, expected=[("UPDATE", "api_user"), ("UPDATE", "api_profile")])
+            profile_update = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "api_profile"')][0]
+            if profile_update.count("=") != 2:
+                raise CommandError(f"Profile update wrote more than full_name: {profile_update}")
+            if api_models.Profile.objects.get(user=user).full_name != "Renamed Reader":
+                raise CommandError("The profile did not follow the new name")
+
+        self.stdout.write(self.style.SUCCESS("Registration and profile sync are within their write budgets."))
+
+    def report(self, label, ctx, expected):
+        found = writes(ctx.captured_queries)
+        self.stdout.write(f"{label:26} {len(ctx.captured_queries):3} queries, user/profile writes: {found}")
+        if found != expected:
+            raise CommandError(f"{label}: expected writes {expected}, got {found}")
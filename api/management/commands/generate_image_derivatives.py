@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api import images
+from api import models as api_models
+from portfolio import models as portfolio_models
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for images already in media storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (api_models.Post, api_models.Profile, portfolio_models.ProjectUpload):
+            names.update(model.objects.exclude(image="").exclude(image=None).values_list("image", flat=True).distinct())
+
+        written = skipped = failed = 0
+        for name in sorted(names):
+            try:
+                count = images.generate(name, force=options["force"])
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"{name}: {error}")
+                continue
+            if count:
+                images.refresh_owners(name)
+                written += count
+                self.stdout.write(f"{name}: {count} derivatives")
+            else:
+                skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(names)} images: wrote {written} files, {skipped} already done, {failed} failed."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import token_blacklist
+
+
+class Command(BaseCommand):
+    help = "Delete expired refresh tokens and their blacklist entries in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Tokens deleted per transaction.")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        removed = token_blacklist.prune(batch_size=options["batch_size"], pause=options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {removed} expired tokens."))
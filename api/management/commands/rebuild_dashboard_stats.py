@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import stats as api_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the AuthorStats dashboard table from the source tables."
+
+    def handle(self, *args, **options):
+        site = api_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt dashboard stats: {site.posts} posts, {site.likes} likes, "
+            f"{site.comments} comments, {site.bookmarks} bookmarks, {site.views} views."
+        ))
@@ -0,0 +1,52 @@
+import os
+import socket
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import jobs
+from api import token_blacklist
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue, reporting how long each one takes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once no job is ready instead of waiting.")
+        parser.add_argument("--worker", default=f"{socket.gethostname()}-{os.getpid()}")
+
+    def handle(self, *args, **options):
+        timings = defaultdict(list)
+        last_prune = 0.0
+        try:
+            while True:
+                close_old_connections()
+                claimed = jobs.claim(options["worker"], limit=options["batch"])
+                for job in claimed:
+                    job = jobs.run(job)
+                    timings[job.name].append(job.duration)
+                    line = f"job {job.pk} {job.name} {job.status} in {job.duration * 1000:.1f}ms (attempt {job.attempts})"
+                    self.stdout.write(self.style.ERROR(line) if job.status == job.FAILED else line)
+
+                if claimed:
+                    continue
+                if time.monotonic() - last_prune > 3600:
+                    jobs.prune()
+                    token_blacklist.prune()
+                    last_prune = time.monotonic()
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        for name, durations in sorted(timings.items()):
+            durations.sort()
+            self.stdout.write(
+                f"{name}: {len(durations)} runs, "
+                f"p50={durations[len(durations) // 2] * 1000:.1f}ms max={durations[-1] * 1000:.1f}ms"
+            )
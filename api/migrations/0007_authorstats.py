@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('views', models.BigIntegerField(default=0)),
+                ('posts', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('projects', models.IntegerField(default=0)),
+                ('users', models.IntegerField(default=0)),
+                ('categories', models.IntegerField(default=0)),
+                ('tags', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Author Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+import html
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# The schema and first fill of api.search.post_index as it stood when this
+# migration was written; later changes to the index ship their own migration.
+CREATE = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS api_post_search "
+        "USING fts5(title, tags, category, description, tokenize='porter unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS api_post_search (object_id bigint PRIMARY KEY, document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS api_post_search_document_idx ON api_post_search USING gin (document)",
+    ],
+}
+INSERT = {
+    "sqlite": "INSERT OR REPLACE INTO api_post_search (rowid, title, tags, category, description) VALUES (%s, %s, %s, %s, %s)",
+    "postgresql": (
+        "INSERT INTO api_post_search (object_id, document) VALUES (%s, "
+        "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+        "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('english', %s), 'D'))"
+    ),
+}
+
+
+def normalize(*values):
+    text = " ".join(strip_tags(value) for value in values if value)
+    return " ".join(html.unescape(text).split())
+
+
+def create_post_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE:
+        return
+    for statement in CREATE[vendor]:
+        schema_editor.execute(statement)
+
+    Post = apps.get_model("api", "Post")
+    posts = Post.objects.using(schema_editor.connection.alias).select_related("category").prefetch_related("tags")
+    rows = [
+        (
+            post.pk,
+            normalize(post.title),
+            normalize(*(tag.name for tag in post.tags.all())),
+            normalize(post.category.title if post.category else None),
+            normalize(post.description),
+        )
+        for post in posts.iterator(chunk_size=500)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(INSERT[vendor], rows)
+
+
+def drop_post_search(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute("DROP TABLE IF EXISTS api_post_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_post_search, drop_post_search),
+    ]
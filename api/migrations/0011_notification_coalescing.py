@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-17 22:32
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill(apps, schema_editor):
+    Notification = apps.get_model("api", "Notification")
+    Notification.objects.update(updated_at=F("date"))
+    # The stats rows are rebuilt with unread counts by 0016_seed_author_stats.
+    apps.get_model("api", "AuthorStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='unread_notifications',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
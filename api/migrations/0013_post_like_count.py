@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 22:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    Post = apps.get_model("api", "Post")
+    likes = Post.likes.through.objects.filter(post_id=OuterRef("pk")).order_by().values("post_id")
+    Post.objects.update(like_count=Coalesce(Subquery(likes.annotate(total=Count("pk")).values("total")), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_notification_stream_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
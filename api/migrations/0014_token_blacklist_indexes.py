@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# Indexes for api.token_blacklist on simplejwt's tables: pruning reads by
+# expires_at and the blacklist filter catches up by blacklisted_at.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_post_like_count'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                "CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx ON token_blacklist_outstandingtoken (expires_at)",
+                "CREATE INDEX IF NOT EXISTS token_blacklisted_at_idx ON token_blacklist_blacklistedtoken (blacklisted_at)",
+            ],
+            [
+                "DROP INDEX IF EXISTS token_outstanding_expires_idx",
+                "DROP INDEX IF EXISTS token_blacklisted_at_idx",
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-17 22:52
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_bookmarks(apps, schema_editor):
+    # Keeps the first bookmark of each (user, post); rebuild_dashboard_stats
+    # brings the bookmark counters back in line afterwards.
+    Bookmark = apps.get_model("api", "Bookmark")
+    duplicates = (
+        Bookmark.objects.values("user_id", "post_id")
+        .annotate(rows=Count("id"), keep=Min("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for dup in duplicates:
+        Bookmark.objects.filter(user_id=dup["user_id"], post_id=dup["post_id"]).exclude(id=dup["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_token_blacklist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-date', '-id'], name='comment_post_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'status', '-date', '-id'], name='post_category_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user', '-id'], name='post_user_id_idx'),
+        ),
+        migrations.RunPython(drop_duplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='bookmark_user_post_uniq'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, F, Sum
+
+GLOBAL = 0
+AUTHOR_FIELDS = ("views", "posts", "likes", "bookmarks", "comments", "projects", "unread_notifications")
+
+
+def seed(apps, schema_editor):
+    """Build the dashboard stats once, so reads never have to (api.stats.rebuild at the time)."""
+    AuthorStats = apps.get_model("api", "AuthorStats")
+    if AuthorStats.objects.filter(pk=GLOBAL).exists():
+        return
+    Post = apps.get_model("api", "Post")
+    ProjectUpload = apps.get_model("portfolio", "ProjectUpload")
+
+    rows = defaultdict(dict)
+    for item in Post.objects.values("user_id").annotate(posts=Count("id"), views=Sum("view")).order_by():
+        rows[item["user_id"]].update(posts=item["posts"], views=item["views"] or 0)
+    related_counts = [
+        ("likes", Post.likes.through.objects.values(owner=F("post__user_id"))),
+        ("bookmarks", apps.get_model("api", "Bookmark").objects.values(owner=F("post__user_id"))),
+        ("comments", apps.get_model("api", "Comment").objects.values(owner=F("post__user_id"))),
+        ("projects", ProjectUpload.objects.values(owner=F("author_id"))),
+        ("unread_notifications", apps.get_model("api", "Notification").objects.filter(seen=False).values(owner=F("user_id"))),
+    ]
+    for field, queryset in related_counts:
+        for item in queryset.annotate(total=Count("pk")).order_by():
+            rows[item["owner"]][field] = item["total"]
+
+    site = AuthorStats(
+        pk=GLOBAL,
+        users=apps.get_model("api", "User").objects.count(),
+        categories=apps.get_model("api", "Category").objects.count(),
+        tags=apps.get_model("portfolio", "Tag").objects.count(),
+        **{field: sum(row.get(field, 0) for row in rows.values()) for field in AUTHOR_FIELDS},
+    )
+    AuthorStats.objects.all().delete()
+    AuthorStats.objects.bulk_create([site, *(AuthorStats(pk=pk, **row) for pk, row in rows.items())])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_query_plan_indexes'),
+        ('portfolio', '0005_project_published_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import post_save
+from django.utils import timezone
 from django.utils.text import slugify
 import shortuuid 
 
@@ -14,10 +15,22 @@ class User(AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']  # Required when creating superusers
+    # Copied onto the Profile when they change, see sync_user_profile
+    PROFILE_FIELDS = ("full_name",)
 
     def __str__(self):
         return self.email  # Better if you want email as unique identity
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._profile_values = user.profile_values()
+        return user
+
+    def profile_values(self):
+        # Deferred fields read as None rather than triggering a query.
+        return {field: self.__dict__.get(field) for field in self.PROFILE_FIELDS}
+
     def save(self, *args, **kwargs):
         if not self.email:
             raise ValueError("Users must have an email address")
@@ -56,15 +69,35 @@ class Profile(models.Model):
 
         super(Profile, self).save(*args, **kwargs)
 
-def create_user_profile(sender, instance, created, **kwargs):
+def sync_user_profile(sender, instance, created, raw=False, **kwargs):
+    """
+    Create the profile with its user. Later saves only write the profile
+    when one of ``User.PROFILE_FIELDS`` changed and the profile still has
+    the old value or none, and then just those columns.
+    """
+    if raw:
+        return
+    loaded = getattr(instance, "_profile_values", {})
+    instance._profile_values = instance.profile_values()
     if created:
         Profile.objects.create(user = instance)
+        return
 
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+    changed = [field for field, value in instance._profile_values.items() if value != loaded.get(field)]
+    if not changed:
+        return
+    profile = Profile.objects.filter(user=instance).first()
+    if profile is None:
+        return
+    update_fields = []
+    for field in changed:
+        if getattr(profile, field) in (None, "", loaded.get(field)):
+            setattr(profile, field, getattr(instance, field))
+            update_fields.append(field)
+    if update_fields:
+        profile.save(update_fields=update_fields)
 
-post_save.connect(create_user_profile, sender=User)
-post_save.connect(save_user_profile, sender=User)
+post_save.connect(sync_user_profile, sender=User)
 
 
 class Category(models.Model):
@@ -103,14 +136,24 @@ class Post(models.Model):
     status = models.CharField(max_length=100, choices=STATUS, default="Active")
     view = models.IntegerField(default=0)
     likes = models.ManyToManyField(User, blank=True, related_name="likes_user")
+    # Number of likes, kept by api/likes.py
+    like_count = models.PositiveIntegerField(default=0)
     slug = models.SlugField(unique=True, null=True, blank=True)
     date = models.DateTimeField(auto_now_add=True)
+    # Also moved by comment and like changes (api/conditional.py)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
     class Meta:
         verbose_name_plural = "Post"
+        indexes = [
+            models.Index(fields=["status", "-date", "-id"], name="post_status_date_id_idx"),
+            models.Index(fields=["status", "updated_at"], name="post_status_updated_idx"),
+            models.Index(fields=["category", "status", "-date", "-id"], name="post_category_status_idx"),
+            models.Index(fields=["user", "-id"], name="post_user_id_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if self.slug == "" or self.slug == None:
@@ -118,7 +161,14 @@ class Post(models.Model):
         super(Post, self).save(*args, **kwargs)
     
     def comments(self):
-        return Comment.objects.filter(post=self).order_by("-id")
+        from api import comment_tree
+
+        if hasattr(self, "prefetched_comments"):
+            comments = self.prefetched_comments
+        else:
+            comments = list(Comment.objects.filter(post=self).order_by("-id"))
+        comment_tree.build(comments)
+        return comments
 
 
 class Comment(models.Model):
@@ -136,6 +186,11 @@ class Comment(models.Model):
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Comment"
+        indexes = [
+            models.Index(fields=["-date", "-id"], name="comment_date_id_idx"),
+            # A post's whole thread, in api.comment_tree order
+            models.Index(fields=["post", "-date", "-id"], name="comment_post_date_id_idx"),
+        ]
 
 class Bookmark(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -148,6 +203,9 @@ class Bookmark(models.Model):
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Bookmark"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="bookmark_user_post_uniq"),
+        ]
 
 
 class Notification(models.Model):
@@ -163,6 +221,9 @@ class Notification(models.Model):
     type = models.CharField(choices=NOTIFICATION_TYPE, max_length=100)
     seen = models.BooleanField(default=False)
     date = models.DateTimeField(auto_now_add=True)
+    # Events folded into this row by api.notifications, and the latest one
+    count = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         if self.post:
@@ -172,4 +233,74 @@ class Notification(models.Model):
         
     class Meta:
         ordering = ["-date"]
-        verbose_name_plural = "Notification"
\ No newline at end of file
+        verbose_name_plural = "Notification"
+        indexes = [
+            models.Index(fields=["user", "seen", "-date", "-id"], name="notif_user_seen_date_idx"),
+            models.Index(fields=["user", "updated_at"], name="notif_user_updated_idx"),
+        ]
+
+
+class AuthorStats(models.Model):
+    """
+    Dashboard counters: one row per author, keyed by user id, plus a
+    site-wide row under GLOBAL. Kept current by the signal handlers in
+    api/stats.py and rebuilt with ``manage.py rebuild_dashboard_stats``.
+    """
+    GLOBAL = 0
+
+    author_id = models.BigIntegerField(primary_key=True)
+    views = models.BigIntegerField(default=0)
+    posts = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    projects = models.IntegerField(default=0)
+    unread_notifications = models.IntegerField(default=0)
+    # Only tracked on the GLOBAL row
+    users = models.IntegerField(default=0)
+    categories = models.IntegerField(default=0)
+    tags = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "Global" if self.author_id == self.GLOBAL else f"Author {self.author_id}"
+
+    class Meta:
+        verbose_name_plural = "Author Stats"
+
+
+class Job(models.Model):
+    """A background job run by ``manage.py run_jobs`` (see api/jobs.py)."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=100, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Seconds taken by the latest attempt
+    duration = models.FloatField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        verbose_name_plural = "Jobs"
+        indexes = [
+            models.Index(fields=["status", "run_after", "id"], name="job_status_run_after_idx"),
+            models.Index(fields=["claimed_by"], name="job_claimed_by_idx"),
+        ]
@@ -0,0 +1,50 @@
+"""
+Coalesced dashboard notifications.
+
+A like, comment or bookmark folds into the recipient's unseen notification
+of the same type for the same post if that one is less than
+NOTIFICATION_COALESCE_WINDOW seconds old, bumping its ``count`` ("12 people
+liked X") instead of adding a row. Each user's number of unseen rows is
+kept in ``AuthorStats.unread_notifications`` by the functions below and
+api.stats, so the dashboard badge is a primary-key read. Connected dashboards are
+pushed every change through api.events.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from api import events
+from api import models as api_models
+from api import stats
+
+Notification = api_models.Notification
+
+
+def notify(post, type):
+    now = timezone.now()
+    window = timedelta(seconds=getattr(settings, "NOTIFICATION_COALESCE_WINDOW", 3600))
+    recent = Notification.objects.filter(
+        user_id=post.user_id, post=post, type=type, seen=False, date__gte=now - window,
+    ).order_by("-date", "-id").values_list("pk", flat=True).first()
+    if recent is not None:
+        Notification.objects.filter(pk=recent).update(count=F("count") + 1, updated_at=now)
+        events.publish_on_commit(recent, post.user_id)
+        return
+    notification = Notification.objects.create(user_id=post.user_id, post=post, type=type, updated_at=now)
+    stats.bump(post.user_id, unread_notifications=1)
+    events.publish_on_commit(notification.pk, post.user_id)
+
+
+def mark_seen(notification_id):
+    notification = Notification.objects.get(id=notification_id)
+    if Notification.objects.filter(pk=notification.pk, seen=False).update(seen=True):
+        stats.bump(notification.user_id, unread_notifications=-1)
+    return notification
+
+
+def mark_all_seen(user_id):
+    cleared = Notification.objects.filter(user_id=user_id, seen=False).update(seen=True)
+    stats.bump(user_id, unread_notifications=-cleared)
+    return cleared
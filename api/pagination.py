@@ -0,0 +1,131 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over a descending ``(date, id)`` key.
+
+    Every page is a ``date <= d AND (date < d OR id < i)`` range read off the
+    index with a LIMIT, so page 500 costs the same as page one. Subclasses
+    point ``ordering`` at other ``(timestamp, pk)`` column pairs.
+    """
+    ordering = ("date", "id")
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        date_field, id_field = self.ordering
+
+        queryset = queryset.order_by(f"-{date_field}", f"-{id_field}")
+        position = self.decode_cursor(request)
+        if position is not None:
+            date, pk = position
+            try:
+                queryset = queryset.filter(**{f"{date_field}__lte": date}).filter(
+                    Q(**{f"{date_field}__lt": date}) | Q(**{f"{id_field}__lt": pk})
+                )
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.has_next:
+            last = results[-1]
+            self.next_position = (getattr(last, date_field), getattr(last, id_field))
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            date, pk = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            date = parse_datetime(date)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk
+
+    def encode_cursor(self, position):
+        date, pk = position
+        payload = json.dumps([date.isoformat(), str(pk)])
+        return base64.urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class OffsetPagination(BasePagination):
+    """
+    ``?offset=`` pagination for ranked results (api.search.SearchResults),
+    which have no stable key to resume from. Reads one extra row to know
+    whether there is a next page instead of counting every match.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    offset_query_param = "offset"
+
+    get_page_size = KeysetPagination.get_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(0, int(request.query_params.get(self.offset_query_param, 0)))
+        except ValueError:
+            self.offset = 0
+
+        results = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        return results[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.offset_query_param, self.offset + self.page_size)
+
+    get_paginated_response = KeysetPagination.get_paginated_response
+    get_paginated_response_schema = KeysetPagination.get_paginated_response_schema
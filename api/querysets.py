@@ -0,0 +1,33 @@
+from django.db.models import Prefetch
+
+from api import models as api_models
+from portfolio.models import Tag
+
+# The Post columns PostSerializer renders. A new column stays out of every
+# list row until it is added here.
+POST_LIST_FIELDS = (
+    "id", "user", "profile", "title", "image", "description", "category", "status",
+    "view", "like_count", "slug", "date", "updated_at",
+)
+
+
+def post_list_queryset(queryset=None):
+    """
+    Load everything PostSerializer reads for a list of posts up front, so a
+    page of posts costs the same number of queries whatever its length.
+    """
+    if queryset is None:
+        queryset = api_models.Post.objects.all()
+
+    # The nested user at depth=1 renders groups/user_permissions as pk lists.
+    return queryset.only(*POST_LIST_FIELDS).select_related("user", "profile", "category").prefetch_related(
+        "user__groups",
+        "user__user_permissions",
+        Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+        # Post.comments() links these into threads with api.comment_tree.
+        Prefetch(
+            "comment_set",
+            queryset=api_models.Comment.objects.order_by("-id"),
+            to_attr="prefetched_comments",
+        ),
+    )
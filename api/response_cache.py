@@ -0,0 +1,181 @@
+"""
+Response cache for public read endpoints, invalidated by dependency tags.
+
+A cached response is stored under its absolute URL (query string included)
+and render format, together with the version of every tag it depends on
+("post:<slug>", "category:<slug>", "post-list", "project-list", ...). A tag is
+invalidated by giving it a new version, which makes every entry recorded
+against the old one a miss. Tag versions live in the same cache as the
+responses, so with a shared backend (CACHE_BACKEND=file or db) an edit in one
+worker invalidates the others too.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from api import models as api_models
+from portfolio import models as portfolio_models
+
+
+def _tag_key(tag):
+    return f"response-tag:{tag}"
+
+
+def make_key(request):
+    renderer = getattr(request, "accepted_renderer", None)
+    fmt = renderer.format if renderer else ""
+    digest = hashlib.md5(f"{fmt}:{request.build_absolute_uri()}".encode()).hexdigest()
+    return f"response:{digest}"
+
+
+def tag_versions(tags):
+    """Current version of each tag, creating versions for tags never seen before."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate(*tags):
+    tags = [tag for tag in tags if tag]
+    if tags:
+        cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def get(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    current = cache.get_many([_tag_key(tag) for tag in entry["versions"]])
+    for tag, version in entry["versions"].items():
+        if current.get(_tag_key(tag)) != version:
+            return None
+    return entry
+
+
+def store(key, response, versions, meta=None):
+    cache.set(key, {
+        "versions": versions,
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "meta": meta,
+    }, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+
+
+class CachedResponseMixin:
+    """
+    Serve GET requests from the response cache until one of the view's
+    ``get_cache_tags()`` is invalidated. Tag versions are read before the
+    response is built, so an edit that lands mid-request is never hidden.
+    """
+
+    def get_cache_tags(self):
+        return []
+
+    def get_cache_meta(self):
+        """Extra data stored with the entry and handed back to ``cache_hit``."""
+        return None
+
+    def cache_hit(self, meta):
+        pass
+
+    def use_response_cache(self):
+        """False for responses that differ between readers."""
+        return getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+
+    def get(self, request, *args, **kwargs):
+        if not self.use_response_cache():
+            return super().get(request, *args, **kwargs)
+
+        key = make_key(request)
+        entry = get(key)
+        if entry is not None:
+            self.cache_hit(entry["meta"])
+            return HttpResponse(entry["content"], content_type=entry["content_type"])
+
+        versions = tag_versions(self.get_cache_tags())
+        response = super().get(request, *args, **kwargs)
+        self.response_cache_entry = (key, versions)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        entry = getattr(self, "response_cache_entry", None)
+        if entry and response.status_code == 200 and hasattr(response, "add_post_render_callback"):
+            key, versions = entry
+            meta = self.get_cache_meta()
+            response.add_post_render_callback(lambda rendered: store(key, rendered, versions, meta))
+        return response
+
+
+# Invalidation
+
+def post_tags(post):
+    category_slug = post.category.slug if post.category_id else None
+    return [f"post:{post.slug}", "post-list", "category-list", category_slug and f"category:{category_slug}"]
+
+
+def post_changed(sender, instance, **kwargs):
+    invalidate(*post_tags(instance))
+
+
+def post_relation_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate(*post_tags(instance))
+        return
+    # user.likes_user / tag-side changes: ``pk_set`` holds post ids
+    posts = api_models.Post.objects.select_related("category")
+    posts = posts.filter(pk__in=pk_set) if pk_set else posts.none()
+    invalidate("post-list", "category-list", *(tag for post in posts for tag in post_tags(post)))
+
+
+def comment_changed(sender, instance, **kwargs):
+    post = api_models.Post.objects.select_related("category").filter(pk=instance.post_id).first()
+    if post is not None:
+        invalidate(*post_tags(post))
+
+
+# Categories, profiles and tags are nested in every post, hence "post-detail".
+
+def category_changed(sender, instance, **kwargs):
+    invalidate(f"category:{instance.slug}", "category-list", "post-list", "post-detail")
+
+
+def author_changed(sender, instance, **kwargs):
+    invalidate("post-list", "post-detail")
+
+
+def project_changed(sender, instance=None, **kwargs):
+    invalidate("project-list")
+
+
+def tag_changed(sender, instance, **kwargs):
+    invalidate("project-list", "post-list", "post-detail")
+
+
+def connect():
+    Post = api_models.Post
+    receivers = (
+        (post_changed, Post),
+        (comment_changed, api_models.Comment),
+        (category_changed, api_models.Category),
+        (author_changed, api_models.Profile),
+        (project_changed, portfolio_models.ProjectUpload),
+        (tag_changed, portfolio_models.Tag),
+    )
+    for receiver, model in receivers:
+        for name, signal in (("saved", post_save), ("deleted", post_delete)):
+            signal.connect(receiver, sender=model, dispatch_uid=f"response_cache_{model.__name__}_{name}")
+
+    m2m_changed.connect(post_relation_changed, sender=Post.likes.through, dispatch_uid="response_cache_post_likes")
+    m2m_changed.connect(post_relation_changed, sender=Post.tags.through, dispatch_uid="response_cache_post_tags")
+    m2m_changed.connect(project_changed, sender=portfolio_models.ProjectUpload.tags.through, dispatch_uid="response_cache_project_tags")
@@ -0,0 +1,322 @@
+"""
+Full-text search indexes kept next to the tables they cover.
+
+Each index stores one normalized document per object, split into weighted
+columns. On SQLite it is an FTS5 table keyed by the object's rowid and ranked
+with bm25(); on PostgreSQL it is a table of weighted ``tsvector`` documents
+behind a GIN index, ranked with ts_rank(). Documents are rewritten from
+signal handlers whenever an object or something folded into its document
+changes, inside the same transaction as the change itself.
+"""
+import html
+import re
+
+from django.db import NotSupportedError, connections, router
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.utils.html import strip_tags
+
+from api import models as api_models
+from portfolio import models as portfolio_models
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TERMS = 16
+BATCH_SIZE = 500
+
+# bm25() takes numeric column weights; tsvector weights are the letters A-D.
+BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+
+
+def normalize(*values):
+    """Plain, single-spaced text from HTML fragments and ``None``s."""
+    text = " ".join(strip_tags(value) for value in values if value)
+    return " ".join(html.unescape(text).split())
+
+
+def parse_terms(query):
+    return [term.lower() for term in TOKEN_RE.findall(query or "")][:MAX_TERMS]
+
+
+class SearchIndex:
+    """
+    Subclasses name the ``table``, the indexed ``model``, the ``columns`` as
+    ``(name, weight)`` pairs and build each document in ``document()``.
+    ``where`` restricts results with SQL on the model's table, aliased "o".
+    """
+    table = None
+    model = None
+    columns = ()
+    # SQLite FTS5 tokenizer and prefix indexes / PostgreSQL text search config
+    tokenizer = "porter unicode61 remove_diacritics 2"
+    prefix_lengths = ""
+    config = "english"
+    where = None
+
+    def get_model(self):
+        return self.model
+
+    def get_queryset(self, model):
+        return model._default_manager.all()
+
+    def document(self, obj):
+        """Return the text for each of ``columns``, in order."""
+        raise NotImplementedError
+
+    def _connection(self, model=None):
+        return connections[router.db_for_write(model or self.get_model())]
+
+    # Schema
+
+    def create(self, connection):
+        names = [name for name, _weight in self.columns]
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                options = [f"tokenize='{self.tokenizer}'"]
+                if self.prefix_lengths:
+                    options.append(f"prefix='{self.prefix_lengths}'")
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                    f"USING fts5({', '.join(names + options)})"
+                )
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} "
+                    f"(object_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx "
+                    f"ON {self.table} USING gin (document)"
+                )
+
+    def drop(self, connection):
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    # Maintenance
+
+    def update(self, pks, model=None):
+        """Rewrite the documents of ``pks``, dropping those that no longer exist."""
+        model = model or self.get_model()
+        pks = list(set(pks))
+        for start in range(0, len(pks), BATCH_SIZE):
+            chunk = pks[start:start + BATCH_SIZE]
+            objects = list(self.get_queryset(model).filter(pk__in=chunk))
+            self._write(model, [(obj.pk, self.document(obj)) for obj in objects])
+            found = {obj.pk for obj in objects}
+            self.delete([pk for pk in chunk if pk not in found], model)
+
+    def delete(self, pks, model=None):
+        pks = list(pks)
+        connection = self._connection(model)
+        key = {"sqlite": "rowid", "postgresql": "object_id"}.get(connection.vendor)
+        if not pks or key is None:
+            return
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), BATCH_SIZE):
+                chunk = pks[start:start + BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"DELETE FROM {self.table} WHERE {key} IN ({placeholders})", chunk)
+
+    def rebuild(self, model=None):
+        """Reindex every object; migrations pass their historical model."""
+        model = model or self.get_model()
+        connection = self._connection(model)
+        if connection.vendor not in ("sqlite", "postgresql"):
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        count = 0
+        queryset = self.get_queryset(model).order_by("pk")
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            objects = list(batch[:BATCH_SIZE])
+            if not objects:
+                return count
+            self._write(model, [(obj.pk, self.document(obj)) for obj in objects])
+            count += len(objects)
+            last_pk = objects[-1].pk
+
+    def _write(self, model, documents):
+        if not documents:
+            return
+        connection = self._connection(model)
+        names = [name for name, _weight in self.columns]
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                placeholders = ", ".join(["%s"] * (len(names) + 1))
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (rowid, {', '.join(names)}) VALUES ({placeholders})",
+                    [[pk, *texts] for pk, texts in documents],
+                )
+            elif connection.vendor == "postgresql":
+                vector = " || ".join(
+                    f"setweight(to_tsvector(%s::regconfig, %s), '{weight}')" for _name, weight in self.columns
+                )
+                cursor.executemany(
+                    f"INSERT INTO {self.table} (object_id, document) VALUES (%s, {vector}) "
+                    f"ON CONFLICT (object_id) DO UPDATE SET document = EXCLUDED.document",
+                    [[pk, *(value for text in texts for value in (self.config, text))] for pk, texts in documents],
+                )
+
+    # Queries
+
+    def search(self, query, limit=20, offset=0, prefix=False):
+        """
+        Primary keys of the objects matching every term of ``query``, best
+        match first. With ``prefix`` the last term also matches longer words,
+        for type-ahead. A ``limit`` of None returns every match.
+        """
+        terms = parse_terms(query)
+        if not terms:
+            return []
+
+        model = self.get_model()
+        connection = connections[router.db_for_read(model)]
+        object_table = model._meta.db_table
+        object_pk = model._meta.pk.column
+        where, where_params = self.where or ("", [])
+        where = f"AND {where}" if where else ""
+
+        if connection.vendor == "sqlite":
+            phrases = [f'"{term}"' for term in terms]
+            if prefix:
+                phrases[-1] += "*"
+            weights = ", ".join(str(BM25_WEIGHTS[weight]) for _name, weight in self.columns)
+            sql = (
+                # FTS5 wants the table name itself, not an alias, for MATCH and bm25()
+                f"SELECT {self.table}.rowid FROM {self.table} "
+                f"JOIN {object_table} o ON o.{object_pk} = {self.table}.rowid "
+                f"WHERE {self.table} MATCH %s {where} "
+                f"ORDER BY bm25({self.table}, {weights}), {self.table}.rowid DESC LIMIT %s OFFSET %s"
+            )
+            params = [" ".join(phrases), *where_params, -1 if limit is None else limit, offset]
+        elif connection.vendor == "postgresql":
+            lexemes = [f"'{term}'" for term in terms]
+            if prefix:
+                lexemes[-1] += ":*"
+            sql = (
+                f"SELECT s.object_id FROM {self.table} s "
+                f"JOIN {object_table} o ON o.{object_pk} = s.object_id, "
+                f"to_tsquery(%s::regconfig, %s) q "
+                f"WHERE s.document @@ q {where} "
+                f"ORDER BY ts_rank(s.document, q) DESC, s.object_id DESC LIMIT %s OFFSET %s"
+            )
+            # LIMIT NULL is no limit on PostgreSQL
+            params = [self.config, " & ".join(lexemes), *where_params, limit, offset]
+        else:
+            raise NotSupportedError(f"Full-text search is not available on {connection.vendor}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SearchResults:
+    """
+    Lazy, sliceable ranked results for a list view. Slicing runs the search
+    for just that window and loads the objects from ``queryset`` in rank
+    order, so paginators never need a full count.
+    """
+
+    def __init__(self, index, query, queryset, prefix=False):
+        self.index = index
+        self.query = query
+        self.queryset = queryset
+        self.prefix = prefix
+
+    def __getitem__(self, window):
+        if not isinstance(window, slice) or window.step is not None:
+            raise TypeError("SearchResults only supports slicing")
+        offset = window.start or 0
+        limit = window.stop - offset
+        pks = self.index.search(self.query, limit=limit, offset=offset, prefix=self.prefix)
+        objects = self.queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+
+class PostSearchIndex(SearchIndex):
+    """Posts by title, tag names, category title and description."""
+    table = "api_post_search"
+    model = api_models.Post
+    columns = (("title", "A"), ("tags", "B"), ("category", "C"), ("description", "D"))
+    where = ("o.status = %s", ["Active"])
+
+    def get_queryset(self, model):
+        return model._default_manager.select_related("category").prefetch_related("tags").only(
+            "id", "title", "description", "category__title"
+        )
+
+    def document(self, post):
+        return (
+            normalize(post.title),
+            normalize(*(tag.name for tag in post.tags.all())),
+            normalize(post.category.title if post.category else None),
+            normalize(post.description),
+        )
+
+
+post_index = PostSearchIndex()
+
+
+# Incremental maintenance
+
+def post_saved(sender, instance, **kwargs):
+    post_index.update([instance.pk])
+
+
+def post_deleted(sender, instance, **kwargs):
+    post_index.delete([instance.pk])
+
+
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            post_index.update([instance.pk])
+        return
+    # tag.post_set changes: ``pk_set`` holds post ids
+    if action == "pre_clear":
+        instance._search_post_ids = list(instance.post_set.values_list("pk", flat=True))
+    elif action == "post_clear":
+        post_index.update(getattr(instance, "_search_post_ids", []))
+    elif action in ("post_add", "post_remove"):
+        post_index.update(pk_set)
+
+
+# Category and tag deletes detach their posts without signals, so the
+# affected ids are collected before the delete and reindexed after it.
+
+def category_saved(sender, instance, created, **kwargs):
+    if not created:
+        post_index.update(instance.posts.values_list("pk", flat=True))
+
+
+def category_deleting(sender, instance, **kwargs):
+    instance._search_post_ids = list(instance.posts.values_list("pk", flat=True))
+
+
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        post_index.update(instance.post_set.values_list("pk", flat=True))
+
+
+def tag_deleting(sender, instance, **kwargs):
+    instance._search_post_ids = list(instance.post_set.values_list("pk", flat=True))
+
+
+def related_deleted(sender, instance, **kwargs):
+    post_index.update(getattr(instance, "_search_post_ids", []))
+
+
+def connect():
+    Post = api_models.Post
+    post_save.connect(post_saved, sender=Post, dispatch_uid="search_post_saved")
+    post_delete.connect(post_deleted, sender=Post, dispatch_uid="search_post_deleted")
+    m2m_changed.connect(post_tags_changed, sender=Post.tags.through, dispatch_uid="search_post_tags")
+
+    post_save.connect(category_saved, sender=api_models.Category, dispatch_uid="search_category_saved")
+    pre_delete.connect(category_deleting, sender=api_models.Category, dispatch_uid="search_category_deleting")
+    post_delete.connect(related_deleted, sender=api_models.Category, dispatch_uid="search_category_deleted")
+    post_save.connect(tag_saved, sender=portfolio_models.Tag, dispatch_uid="search_tag_saved")
+    pre_delete.connect(tag_deleting, sender=portfolio_models.Tag, dispatch_uid="search_tag_deleting")
+    post_delete.connect(related_deleted, sender=portfolio_models.Tag, dispatch_uid="search_tag_deleted")
@@ -1,9 +1,12 @@
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
 from .models import Category
 
+from api import images
 from api import models as api_models
+from api import viewer_state
 from portfolio.models import Tag
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -30,35 +33,46 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attr
     
     def create(self, valiated_data):
-        user = api_models.User.objects.create(
+        user = api_models.User(
             full_name = valiated_data['full_name'],
             email = valiated_data['email'],
         )
-
-        email_username, mobile = user.email.split("@")
-        user.username = email_username
-
         user.set_password(valiated_data['password'])
-        user.save()
+
+        # One INSERT for the user (User.save() fills in the username from
+        # the email) and one for its profile, committed together.
+        with transaction.atomic():
+            user.save()
 
         return user
     
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Resized variants of an image field, by format and width (api.images)."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "image")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return images.variants(value, self.context.get("request"))
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = api_models.User
         fields = "__all__"
 
 class ProfileSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = api_models.Profile
         fields = "__all__"
 
-class CategorySerializer(serializers.ModelSerializer):
-    post_count = serializers.SerializerMethodField()
+class CategoryListSerializer(serializers.ModelSerializer):
+    # Annotated by api.category_index, counting Active posts only
+    post_count = serializers.IntegerField(read_only=True)
 
-    def get_post_count(self, category):
-        return category.posts.count()
-    
     class Meta:
         model = api_models.Category
         fields = [
@@ -69,14 +83,6 @@ class CategorySerializer(serializers.ModelSerializer):
             "post_count",
         ]
 
-    def __init__(self, *args, **kwargs):
-        super(CategorySerializer, self).__init__(*args, **kwargs)
-        request = self.context.get('request')
-        if request and request.method == 'POST':
-            self.Meta.depth = 0
-        else:
-            self.Meta.depth = 3
-
  
 class CommentSerializer(serializers.ModelSerializer):
     replies = serializers.SerializerMethodField()
@@ -86,8 +92,11 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'post', 'parent', 'name', 'email', 'comment', 'reply', 'date', 'replies']
 
     def get_replies(self, obj):
-        replies_qs = obj.replies.all().order_by('-date')
-        return CommentSerializer(replies_qs, many=True, context=self.context).data if replies_qs.exists() else []
+        # Trees built by api.comment_tree carry their replies already.
+        replies = getattr(obj, "loaded_replies", None)
+        if replies is None:
+            replies = obj.replies.all()
+        return CommentSerializer(replies, many=True, context=self.context).data
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -97,18 +106,30 @@ class PostSerializer(serializers.ModelSerializer):
         slug_field='name'
     )
     comments = CommentSerializer(many=True)
+    image_variants = ImageVariantsField()
+    # Only with ?viewer_state=1 (api/viewer_state.py)
+    viewer = serializers.SerializerMethodField()
+
     class Meta:
         model = api_models.Post
-        fields = "__all__"
+        # Likes are like_count here and viewer.liked with ?viewer_state=1;
+        # a post can have far too many likers to list.
+        exclude = ["likes"]
+        read_only_fields = ["like_count"]
 
     def __init__(self, *args, **kwargs):
         super(PostSerializer, self).__init__(*args,**kwargs)
+        if not self.context.get("viewer_state"):
+            self.fields.pop("viewer")
         request = self.context.get("request")
         if request and request.method == "POST":
             self.Meta.depth = 0
         else:
             self.Meta.depth = 1
 
+    def get_viewer(self, post):
+        return viewer_state.flags(post)
+
 class BookmarkSerializer(serializers.ModelSerializer):
     class Meta:
         model = api_models.Bookmark
@@ -136,6 +157,16 @@ class NotificationSerializer(serializers.ModelSerializer):
             self.Meta.depth = 1
 
 
+class NotificationListSerializer(serializers.ModelSerializer):
+    """The dashboard list: the post's id, title and slug instead of nested user and post rows."""
+    post_title = serializers.CharField(source="post.title", read_only=True)
+    post_slug = serializers.CharField(source="post.slug", read_only=True)
+
+    class Meta:
+        model = api_models.Notification
+        fields = ["id", "type", "count", "seen", "date", "updated_at", "post", "post_title", "post_slug"]
+
+
 class AuthorSerializer(serializers.Serializer):
     views = serializers.IntegerField(default=0)
     posts = serializers.IntegerField(default=0)
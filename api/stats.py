@@ -0,0 +1,216 @@
+"""
+Incrementally maintained dashboard statistics (see ``AuthorStats``).
+
+Each write that changes a dashboard number applies a ``F() + delta`` update
+to the author's row and to the GLOBAL row, so serving the dashboard is a
+single primary-key read. The table is first built by migration
+api/0016_seed_author_stats (or ``manage.py rebuild_dashboard_stats``);
+until its GLOBAL row exists updates are skipped and reads return zeros.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from api import models as api_models
+from portfolio import models as portfolio_models
+
+AuthorStats = api_models.AuthorStats
+GLOBAL = AuthorStats.GLOBAL
+
+AUTHOR_FIELDS = ("views", "posts", "likes", "bookmarks", "comments", "projects", "unread_notifications")
+
+
+def bump(author_id, **deltas):
+    """Add ``deltas`` to ``author_id``'s row and the GLOBAL row (just GLOBAL if ``author_id`` is None)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    keys = [GLOBAL] if author_id is None else [author_id, GLOBAL]
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    with transaction.atomic():
+        if AuthorStats.objects.filter(pk__in=keys).update(**changes) == len(keys):
+            return
+        existing = set(AuthorStats.objects.filter(pk__in=keys).values_list("pk", flat=True))
+        if GLOBAL not in existing:
+            return
+        # First event for this author: its row starts from the delta.
+        AuthorStats.objects.bulk_create(
+            [AuthorStats(pk=key, **deltas) for key in keys if key not in existing],
+            ignore_conflicts=True,
+        )
+
+
+def add_views(counts):
+    """Apply a ``{post_id: views}`` batch flushed by api.view_counter."""
+    per_author = Counter()
+    posts = api_models.Post.objects.filter(id__in=counts).values_list("id", "user_id")
+    for post_id, user_id in posts:
+        per_author[user_id] += counts[post_id]
+    for user_id, views in per_author.items():
+        bump(user_id, views=views)
+
+
+def rebuild():
+    """Recompute every row from the source tables."""
+    rows = {}
+
+    def row(author_id):
+        if author_id not in rows:
+            rows[author_id] = AuthorStats(pk=author_id)
+        return rows[author_id]
+
+    for item in api_models.Post.objects.values("user_id").annotate(posts=Count("id"), views=Sum("view")):
+        author = row(item["user_id"])
+        author.posts, author.views = item["posts"], item["views"] or 0
+
+    related_counts = [
+        ("likes", api_models.Post.likes.through.objects.values(owner=F("post__user_id"))),
+        ("bookmarks", api_models.Bookmark.objects.values(owner=F("post__user_id"))),
+        ("comments", api_models.Comment.objects.values(owner=F("post__user_id"))),
+        ("projects", portfolio_models.ProjectUpload.objects.values(owner=F("author_id"))),
+        ("unread_notifications", api_models.Notification.objects.filter(seen=False).values(owner=F("user_id"))),
+    ]
+    for field, queryset in related_counts:
+        for item in queryset.annotate(total=Count("pk")).order_by():
+            setattr(row(item["owner"]), field, item["total"])
+
+    site = AuthorStats(pk=GLOBAL)
+    for field in AUTHOR_FIELDS:
+        setattr(site, field, sum(getattr(author, field) for author in rows.values()))
+    site.users = api_models.User.objects.count()
+    site.categories = api_models.Category.objects.count()
+    site.tags = portfolio_models.Tag.objects.count()
+
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create([site, *rows.values()])
+    return site
+
+
+def dashboard_stats(author_id):
+    """The dashboard numbers for ``author_id`` in one primary-key lookup."""
+    rows = {stats.pk: stats for stats in AuthorStats.objects.filter(pk__in=[author_id, GLOBAL])}
+    author = rows.get(author_id) or AuthorStats(pk=author_id)
+    site = rows.get(GLOBAL) or AuthorStats(pk=GLOBAL)
+    return {
+        "views": author.views,
+        "posts": author.posts,
+        "likes": author.likes,
+        "bookmarks": site.bookmarks,
+        "categories": site.categories,
+        "tags": site.tags,
+        "projects": site.projects,
+        "users": site.users,
+        "comments": site.comments,
+    }
+
+
+def unread_notifications(user_id):
+    """``user_id``'s unseen notification count in one primary-key lookup."""
+    stats = AuthorStats.objects.filter(pk=user_id).values_list("unread_notifications", flat=True).first()
+    return stats or 0
+
+
+# Signal handlers
+
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.user_id, posts=1, views=instance.view)
+
+
+def post_deleting(sender, instance, **kwargs):
+    # pre_delete: the likes through rows are still there to count.
+    bump(instance.user_id, posts=-1, views=-instance.view, likes=-instance.likes.count())
+
+
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # On remove, api.likes.narrow_removed has already cut pk_set down to the
+    # likes that existed.
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    sign = 1 if action == "post_add" else -1
+
+    if not reverse:
+        total = instance.likes.count() if action == "pre_clear" else len(pk_set)
+        bump(instance.user_id, likes=sign * total)
+        return
+
+    # user.likes_user.add(...): ``pk_set`` holds post ids
+    if action == "pre_clear":
+        posts = api_models.Post.objects.filter(likes=instance)
+    else:
+        posts = api_models.Post.objects.filter(pk__in=pk_set)
+    for item in posts.values("user_id").annotate(total=Count("pk")).order_by():
+        bump(item["user_id"], likes=sign * item["total"])
+
+
+def post_child_saved(field):
+    def handler(sender, instance, created, **kwargs):
+        if created:
+            bump(instance.post.user_id, **{field: 1})
+    return handler
+
+
+def post_child_deleted(field):
+    def handler(sender, instance, **kwargs):
+        author_id = api_models.Post.objects.filter(pk=instance.post_id).values_list("user_id", flat=True).first()
+        if author_id is not None:
+            bump(author_id, **{field: -1})
+    return handler
+
+
+def project_saved(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.author_id, projects=1)
+
+
+def project_deleted(sender, instance, **kwargs):
+    bump(instance.author_id, projects=-1)
+
+
+def site_counter(field, delta):
+    def handler(sender, instance, created=True, **kwargs):
+        if created:
+            bump(None, **{field: delta})
+    return handler
+
+
+def notification_deleted(sender, instance, **kwargs):
+    # Created and marked seen through api.notifications; deletes come from
+    # anywhere, post and user cascades included.
+    if not instance.seen:
+        bump(instance.user_id, unread_notifications=-1)
+
+
+def user_deleted(sender, instance, **kwargs):
+    bump(None, users=-1)
+    AuthorStats.objects.filter(pk=instance.pk).delete()
+
+
+def connect():
+    Post = api_models.Post
+    post_save.connect(post_created, sender=Post, dispatch_uid="stats_post_created")
+    pre_delete.connect(post_deleting, sender=Post, dispatch_uid="stats_post_deleting")
+    m2m_changed.connect(likes_changed, sender=Post.likes.through, dispatch_uid="stats_likes_changed")
+
+    for model, field in ((api_models.Bookmark, "bookmarks"), (api_models.Comment, "comments")):
+        post_save.connect(post_child_saved(field), sender=model, weak=False, dispatch_uid=f"stats_{field}_saved")
+        post_delete.connect(post_child_deleted(field), sender=model, weak=False, dispatch_uid=f"stats_{field}_deleted")
+
+    post_delete.connect(notification_deleted, sender=api_models.Notification, dispatch_uid="stats_notification_deleted")
+
+    post_save.connect(project_saved, sender=portfolio_models.ProjectUpload, dispatch_uid="stats_project_saved")
+    post_delete.connect(project_deleted, sender=portfolio_models.ProjectUpload, dispatch_uid="stats_project_deleted")
+
+    for model, field in (
+        (api_models.User, "users"),
+        (api_models.Category, "categories"),
+        (portfolio_models.Tag, "tags"),
+    ):
+        post_save.connect(site_counter(field, 1), sender=model, weak=False, dispatch_uid=f"stats_{field}_saved")
+        if model is not api_models.User:
+            post_delete.connect(site_counter(field, -1), sender=model, weak=False, dispatch_uid=f"stats_{field}_deleted")
+    post_delete.connect(user_deleted, sender=api_models.User, dispatch_uid="stats_user_deleted")
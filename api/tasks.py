@@ -0,0 +1,27 @@
+"""
+Side effects of the blog's write endpoints, run by the job queue (api/jobs.py).
+
+Each task keeps its writes in one short transaction (see api/jobs.py).
+"""
+from django.db import transaction
+
+from api import jobs
+from api import models as api_models
+from api import notifications
+from portfolio import tag_index
+
+
+@jobs.task("notifications.create")
+def create_notification(post_id, type):
+    post = api_models.Post.objects.filter(pk=post_id).only("id", "user_id").first()
+    if post is not None:
+        with transaction.atomic():
+            notifications.notify(post, type)
+
+
+@jobs.task("posts.attach_tags")
+def attach_tags(post_id, names):
+    post = api_models.Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        with transaction.atomic():
+            tag_index.attach(post.tags, names)
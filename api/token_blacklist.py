@@ -0,0 +1,157 @@
+"""
+Refresh token blacklist upkeep: batched pruning and an in-memory filter.
+
+Every refresh rotates the token and blacklists the old one, adding an
+OutstandingToken and a BlacklistedToken row. ``prune()`` deletes the
+tokens that have expired in small batches, each in its own short
+transaction, so writers are never held up for long; ``run_jobs`` runs it
+hourly and ``prune_token_blacklist`` on demand.
+
+Refreshes check the blacklist through ``blacklist_filter``, a Bloom filter
+of the blacklisted JTIs that haven't expired. A JTI the filter has never
+seen, the common case, costs no query; a possible match is confirmed
+against the table. The filter is rebuilt every TOKEN_BLACKLIST_FILTER_REBUILD
+seconds and caught up with rows blacklisted by other processes every
+TOKEN_BLACKLIST_SYNC_INTERVAL seconds, so a token blacklisted elsewhere
+may still be accepted here within that interval.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BloomFilter:
+    """A fixed-size set of strings with false positives but no false negatives."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built = 0.0
+        self._synced = 0.0
+        self._cursor = None
+
+    def _load(self, queryset):
+        return list(queryset.filter(token__expires_at__gt=aware_utcnow()).values_list("token__jti", flat=True))
+
+    def _rebuild(self):
+        cursor = aware_utcnow()
+        jtis = self._load(BlacklistedToken.objects.all())
+        # Room to grow before the next rebuild
+        bloom = BloomFilter(max(len(jtis) * 2, _setting("TOKEN_BLACKLIST_FILTER_CAPACITY", 10000)))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom, self._cursor = bloom, cursor
+        self._built = self._synced = time.monotonic()
+
+    def _sync(self):
+        # Re-read a few seconds back for transactions that committed late.
+        cursor = aware_utcnow()
+        since = self._cursor - timedelta(seconds=5)
+        for jti in self._load(BlacklistedToken.objects.filter(blacklisted_at__gte=since)):
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+        self._cursor = cursor
+        self._synced = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._bloom is None
+                or now - self._built > _setting("TOKEN_BLACKLIST_FILTER_REBUILD", 3600)
+                or self._bloom.count > self._bloom.capacity
+            ):
+                self._rebuild()
+            elif now - self._synced >= _setting("TOKEN_BLACKLIST_SYNC_INTERVAL", 2):
+                self._sync()
+            return self._bloom
+
+    def contains(self, jti):
+        if jti not in self._refresh():
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class RefreshToken(tokens.RefreshToken):
+    def check_blacklist(self):
+        if blacklist_filter.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        # Added straight away: should the transaction roll back, the stray
+        # entry is only a false positive, cleared by the table check.
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return super().blacklist()
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+def prune(batch_size=None, pause=0):
+    """Delete expired outstanding tokens and their blacklist rows; returns how many."""
+    batch_size = batch_size or _setting("TOKEN_BLACKLIST_PRUNE_BATCH", 1000)
+    cutoff = aware_utcnow()
+    removed = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            removed += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
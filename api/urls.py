@@ -14,6 +14,8 @@ urlpatterns = [
     path('post/category/list/', api_views.CategoryListAPIView.as_view()),
     path('post/category/posts/<category_slug>/', api_views.PostCategoryListAPIView.as_view()),
     path('post/lists/', api_views.PostListAPIView.as_view()),
+    path('post/search/', api_views.PostSearchAPIView.as_view()),
+    path('post/viewer-state/', api_views.PostViewerStateAPIView.as_view()),
     path('post/detail/<slug>/', api_views.PostDetailAPIView.as_view()),
     path('post/like-post/', api_views.LikePostAPIView.as_view()),
     path('post/comment-post/', api_views.PostCommentAPIView.as_view()),
@@ -24,6 +26,8 @@ urlpatterns = [
     path('author/dashboard/post-list/<user_id>/', api_views.DashboardPostLists.as_view()),
     path('author/dashboard/comment-list/<user_id>/', api_views.DashboardCommentLists.as_view()),
     path('author/dashboard/notification-list/<user_id>/', api_views.DashboardNotificationsList.as_view()),
+    path('author/dashboard/notification-unread-count/<int:user_id>/', api_views.DashboardNotificationUnreadCount.as_view()),
+    path('author/dashboard/notification-stream/<int:user_id>/', api_views.dashboard_notification_stream),
     path('author/dashboard/notification-mark-seen/', api_views.DashboardMarkNotificationAsSeen.as_view()),
     path('author/clear-notifications/', api_views.DashboardClearAllNotifications.as_view()),
     path('author/dashboard/reply-comment/', api_views.DashboardCommentAPIView.as_view()),
@@ -0,0 +1,58 @@
+"""
+Write-behind counter for ``Post.view``.
+
+Reads only bump an in-memory counter; a background thread turns the pending
+counts into a handful of ``UPDATE ... SET view = view + n`` statements every
+``VIEW_COUNTER_FLUSH_INTERVAL`` seconds, and whatever is left is flushed when
+the process exits. Setting the interval to 0 writes every hit straight
+through, which is handy in tests.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from api.write_behind import WriteBehindBuffer
+
+
+class ViewCounter(WriteBehindBuffer):
+    name = "post-view"
+    interval_setting = "VIEW_COUNTER_FLUSH_INTERVAL"
+    max_pending_setting = "VIEW_COUNTER_MAX_PENDING"
+
+    def incr(self, post_id, amount=1):
+        """
+        Record ``amount`` views of ``post_id``. Returns how many of its views a
+        row loaded before this call does not include yet.
+        """
+        return self.add(post_id, amount)
+
+    def pending(self, post_id=None):
+        if post_id is not None:
+            return self.get(post_id, 0)
+        with self._lock:
+            return sum(self._pending.values())
+
+    def combine(self, old, new):
+        return old + new
+
+    def write(self, batch):
+        from api import stats
+        from api.models import Post
+
+        # Posts that got the same number of hits share one UPDATE.
+        by_amount = defaultdict(list)
+        for post_id, amount in batch.items():
+            by_amount[amount].append(post_id)
+
+        with transaction.atomic():
+            for amount, post_ids in by_amount.items():
+                Post.objects.filter(id__in=post_ids).update(view=F("view") + amount)
+            stats.add_views(batch)
+
+
+view_counter = ViewCounter()
+
+
+def install_shutdown_hook():
+    view_counter.install_shutdown_hook()
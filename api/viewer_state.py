@@ -0,0 +1,66 @@
+"""
+"Did I like or bookmark this?" for the signed-in reader, across many posts.
+
+``for_posts()`` answers it for a list of post ids with two set-based
+queries, one on the likes through table and one on bookmarks. Post lists
+opt in with ``?viewer_state=1``: ``ViewerStateMixin`` adds a prefetch of
+the reader's own likes and bookmarks for the page, and PostSerializer
+renders them as a ``viewer`` object on each post. Those responses depend
+on the reader, so they skip the shared response cache and conditional GET.
+"""
+from django.db.models import Prefetch
+
+from api import models as api_models
+
+MAX_POSTS = 100
+QUERY_PARAM = "viewer_state"
+
+Like = api_models.Post.likes.through
+
+
+def for_posts(user_id, post_ids):
+    """``{post_id: {"liked": bool, "bookmarked": bool}}`` for ``user_id``."""
+    post_ids = set(post_ids)
+    liked = set(Like.objects.filter(user_id=user_id, post_id__in=post_ids).values_list("post_id", flat=True))
+    bookmarked = set(
+        api_models.Bookmark.objects.filter(user_id=user_id, post_id__in=post_ids).values_list("post_id", flat=True)
+    )
+    return {pk: {"liked": pk in liked, "bookmarked": pk in bookmarked} for pk in post_ids}
+
+
+def prefetch(queryset, user_id):
+    """Load ``user_id``'s like and bookmark of each post with the page."""
+    return queryset.prefetch_related(
+        Prefetch("likes", queryset=api_models.User.objects.filter(pk=user_id).only("id"), to_attr="viewer_likes"),
+        Prefetch(
+            "bookmark_set",
+            queryset=api_models.Bookmark.objects.filter(user_id=user_id).only("id", "post_id"),
+            to_attr="viewer_bookmarks",
+        ),
+    )
+
+
+def flags(post):
+    return {"liked": bool(post.viewer_likes), "bookmarked": bool(post.viewer_bookmarks)}
+
+
+class ViewerStateMixin:
+    """For post list views; their querysets go through ``with_viewer_state()``."""
+
+    def get_viewer_id(self):
+        if self.request.query_params.get(QUERY_PARAM) not in ("1", "true"):
+            return None
+        user = self.request.user
+        return user.pk if user.is_authenticated else None
+
+    def with_viewer_state(self, queryset):
+        viewer_id = self.get_viewer_id()
+        return queryset if viewer_id is None else prefetch(queryset, viewer_id)
+
+    def use_response_cache(self):
+        return self.get_viewer_id() is None and super().use_response_cache()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["viewer_state"] = self.get_viewer_id() is not None
+        return context
@@ -1,10 +1,13 @@
-from django.db.models import Sum
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 # Restframework
 from rest_framework import status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import AuthenticationFailed, NotFound
 from rest_framework.decorators import  APIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings as drf_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -16,7 +19,20 @@ from drf_yasg.utils import swagger_auto_schema
 # Custom Imports
 from api import serializer as api_serializer
 from api import models as api_models
-from portfolio import models as portfolio_models
+from api import category_index
+from api import comment_tree
+from api import conditional
+from api import events as api_events
+from api import jobs
+from api import likes as api_likes
+from api import notifications as api_notifications
+from api import pagination as api_pagination
+from api import querysets as api_querysets
+from api import response_cache
+from api import search as api_search
+from api import stats as api_stats
+from api import viewer_state
+from api.view_counter import view_counter
 from portfolio.models import Tag
 
 from django.http import HttpResponse
@@ -44,41 +60,119 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         profile = api_models.Profile.objects.get(user=user)
         return profile
 
-class CategoryListAPIView(generics.ListAPIView):
-    serializer_class = api_serializer.CategorySerializer
+class CategoryListAPIView(response_cache.CachedResponseMixin, generics.ListAPIView):
+    serializer_class = api_serializer.CategoryListSerializer
     permission_classes = [AllowAny]
 
+    def get_cache_tags(self):
+        return ["category-list"]
+
     def get_queryset(self):
-        return api_models.Category.objects.all()
+        return category_index.get_categories()
     
 
-class PostCategoryListAPIView(generics.ListAPIView):
+class PostCategoryListAPIView(viewer_state.ViewerStateMixin, response_cache.CachedResponseMixin, generics.ListAPIView):
     serializer_class = api_serializer.PostSerializer
     permission_classes = [AllowAny]
 
+    def get_cache_tags(self):
+        return ["post-list", f"category:{self.kwargs['category_slug']}"]
+
     def get_queryset(self):
         category_slug = self.kwargs['category_slug'] 
         category = get_object_or_404(api_models.Category, slug=category_slug)
-        return api_models.Post.objects.filter(category=category, status="Active")
+        return self.with_viewer_state(api_querysets.post_list_queryset().filter(category=category, status="Active"))
     
-class PostListAPIView(generics.ListAPIView):
+class PostListAPIView(viewer_state.ViewerStateMixin, conditional.ConditionalGetMixin, response_cache.CachedResponseMixin, generics.ListAPIView):
+    serializer_class = api_serializer.PostSerializer
+    permission_classes = [AllowAny]
+    pagination_class = api_pagination.KeysetPagination
+
+    def get_cache_tags(self):
+        return ["post-list"]
+
+    def get_validators(self):
+        if self.get_viewer_id() is not None:
+            return None
+        posts = api_models.Post.objects.filter(status="Active")
+        return conditional.queryset_validators(posts, "updated_at", self.get_cache_tags())
+
+    def get_queryset(self):
+        return self.with_viewer_state(api_querysets.post_list_queryset().filter(status="Active"))
+
+
+class PostSearchAPIView(viewer_state.ViewerStateMixin, response_cache.CachedResponseMixin, generics.ListAPIView):
     serializer_class = api_serializer.PostSerializer
     permission_classes = [AllowAny]
+    pagination_class = api_pagination.OffsetPagination
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_cache_tags(self):
+        return ["post-list"]
 
     def get_queryset(self):
-        return api_models.Post.objects.filter(status="Active")
+        query = self.request.query_params.get("q", "")
+        queryset = self.with_viewer_state(api_querysets.post_list_queryset())
+        return api_search.SearchResults(api_search.post_index, query, queryset)
+
+
+class PostViewerStateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('ids', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description='Comma-separated post ids'),
+    ])
+    def get(self, request):
+        try:
+            post_ids = [int(pk) for pk in request.query_params.get("ids", "").split(",") if pk.strip()]
+        except ValueError:
+            return Response({"message": "ids must be comma-separated integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(post_ids) > viewer_state.MAX_POSTS:
+            return Response({"message": f"At most {viewer_state.MAX_POSTS} ids"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(viewer_state.for_posts(request.user.pk, post_ids))
 
     
-class PostDetailAPIView(generics.RetrieveAPIView):
+class PostDetailAPIView(conditional.ConditionalGetMixin, response_cache.CachedResponseMixin, generics.RetrieveAPIView):
     serializer_class = api_serializer.PostSerializer
     permission_classes = [AllowAny]
 
     def get_object(self):
         slug = self.kwargs['slug']
-        post = api_models.Post.objects.get(slug=slug, status="Active")
-        post.view += 1
-        post.save()
+        post = api_querysets.post_list_queryset().get(slug=slug, status="Active")
+        # Buffered; api.view_counter writes it back in batches.
+        post.view += view_counter.incr(post.id)
+        self.post_id = post.id
         return post
+
+    def get_cache_tags(self):
+        return [f"post:{self.kwargs['slug']}", "post-detail"]
+
+    def get_cache_meta(self):
+        return {"post_id": self.post_id}
+
+    def cache_hit(self, meta):
+        # Cached pages still count as views.
+        view_counter.incr(meta["post_id"])
+
+    def get_validators(self):
+        post = api_models.Post.objects.filter(slug=self.kwargs['slug'], status="Active").values("id", "updated_at").first()
+        if post is None:
+            return None
+        self.post_id = post["id"]
+        versions = response_cache.tag_versions(self.get_cache_tags())
+        etag = conditional.make_etag(post["id"], post["updated_at"].isoformat(), sorted(versions.items()))
+        return etag, post["updated_at"]
+
+    def not_modified(self):
+        # So do 304s.
+        view_counter.incr(self.post_id)
     
 class LikePostAPIView(APIView):
     @swagger_auto_schema(
@@ -97,21 +191,17 @@ class LikePostAPIView(APIView):
         user_id = request.data['user_id']
         post_id = request.data['post_id']
 
-        user = api_models.User.objects.get(id=user_id)
-        post = api_models.Post.objects.get(id=post_id)
-
-        if user in post.likes.all():
-            post.likes.remove(user)
-            return Response({"message" : "Post Disliked"}, status=status.HTTP_200_OK)
-        else:
-            post.likes.add(user)
+        try:
+            with transaction.atomic():
+                liked = api_likes.toggle(post_id, user_id)
+                if liked:
+                    jobs.enqueue("notifications.create", {"post_id": post_id, "type": "Like"})
+        except api_models.Post.DoesNotExist:
+            raise NotFound("Post not found.")
 
-            api_models.Notification.objects.create(
-                user=post.user,
-                post=post,
-                type="Like"
-            )
+        if liked:
             return Response({"message": "Post Liked"}, status=status.HTTP_201_CREATED)
+        return Response({"message" : "Post Disliked"}, status=status.HTTP_200_OK)
         
 class PostCommentAPIView(APIView):
     @swagger_auto_schema(
@@ -148,20 +238,15 @@ class PostCommentAPIView(APIView):
             except api_models.Comment.DoesNotExist:
                 return Response({"message": "Parent comment not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-        comment_obj = api_models.Comment.objects.create(
-            post=post,
-            name=name,
-            email=email,
-            comment=comment,
-            parent=parent_comment
-        )
-
-        # Optional notification
-        api_models.Notification.objects.create(
-            user=post.user,
-            post=post,
-            type="Comment"
-        )
+        with transaction.atomic():
+            comment_obj = api_models.Comment.objects.create(
+                post=post,
+                name=name,
+                email=email,
+                comment=comment,
+                parent=parent_comment
+            )
+            jobs.enqueue("notifications.create", {"post_id": post.id, "type": "Comment"})
 
         return Response({
             "message": "Comment Sent",
@@ -186,8 +271,20 @@ class PostCommentAPIView(APIView):
         except api_models.Post.DoesNotExist:
             return Response({"message": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Get only top-level comments
-        comments = api_models.Comment.objects.filter(post=post, parent=None).order_by('-date')
+        # Optional caps on how deep and how wide the reply tree goes
+        try:
+            limits = {
+                name: int(request.query_params[name])
+                for name in ("max_depth", "max_replies")
+                if name in request.query_params
+            }
+        except ValueError:
+            limits = None
+        if limits is None or any(limit < 0 for limit in limits.values()):
+            return Response({"message": "max_depth and max_replies must be non-negative integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Whole thread in one query, top-level comments first
+        comments = comment_tree.for_post(post, **limits)
 
         def get_comment_data(comment):
             return {
@@ -196,16 +293,7 @@ class PostCommentAPIView(APIView):
                 "email": comment.email,
                 "comment": comment.comment,
                 "date": comment.date,
-                "replies": [
-                    {
-                        "id": reply.id,
-                        "name": reply.name,
-                        "email": reply.email,
-                        "comment": reply.comment,
-                        "date": reply.date,
-                    }
-                    for reply in comment.replies.all().order_by('-date')
-                ]
+                "replies": [get_comment_data(reply) for reply in comment.loaded_replies],
             }
 
         comment_data = [get_comment_data(c) for c in comments]
@@ -235,15 +323,16 @@ class BookmarkPostAPIView(APIView):
             bookmark.delete()
             return Response({"message": "Post Un-Bookmarked"}, status=status.HTTP_200_OK)
         else:
-            api_models.Bookmark.objects.create(
-                user=user,
-                post=post
-            )
-            api_models.Notification.objects.create(
-                user=post.user,
-                post=post,
-                type="Bookmark",
-            )
+            try:
+                with transaction.atomic():
+                    api_models.Bookmark.objects.create(
+                        user=user,
+                        post=post
+                    )
+                    jobs.enqueue("notifications.create", {"post_id": post.id, "type": "Bookmark"})
+            except IntegrityError:
+                # A concurrent request bookmarked it first (bookmark_user_post_uniq)
+                return Response({"message": "Post Bookmarked"}, status=status.HTTP_200_OK)
             return Response({"message": "Post Bookmarked"}, status=status.HTTP_201_CREATED)
         
 class DashboardStats(generics.ListAPIView):
@@ -251,31 +340,11 @@ class DashboardStats(generics.ListAPIView):
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        user_id = self.kwargs['user_id']
-        user = api_models.User.objects.get(id=user_id)
-
-        views = api_models.Post.objects.filter(user=user).aggregate(view=Sum("view"))['view']
-        posts = api_models.Post.objects.filter(user=user).count()
-        likes = api_models.Post.objects.filter(user=user).aggregate(total_likes=Sum("likes"))['total_likes']
-        bookmarks = api_models.Bookmark.objects.all().count()
-        categories = api_models.Category.objects.all().count()
-        tags = portfolio_models.Tag.objects.all().count()
-        projects = portfolio_models.ProjectUpload.objects.all().count()
-        users = api_models.User.objects.all().count()
-        comments = api_models.Comment.objects.all().count()
-
-
-        return [{
-            "views":views,
-            "posts":posts,
-            "likes":likes,
-            "bookmarks":bookmarks,
-            "categories":categories,
-            "tags":tags,
-            "projects": projects,
-            "users":users,
-            "comments":comments,
-        }]
+        try:
+            user_id = int(self.kwargs['user_id'])
+        except ValueError:
+            raise NotFound("User not found.")
+        return [api_stats.dashboard_stats(user_id)]
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -289,36 +358,75 @@ class DashboardPostLists(generics.ListAPIView):
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user = api_models.User.objects.get(id=user_id)
-        return api_models.Post.objects.filter(user=user).order_by("-id")
+        return api_querysets.post_list_queryset().filter(user=user).order_by("-id")
 
 
     
 class DashboardCommentLists(generics.ListAPIView):
     serializer_class = api_serializer.CommentSerializer
     permission_classes = [AllowAny]
+    pagination_class = api_pagination.KeysetPagination
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user = api_models.User.objects.get(id=user_id)
         return api_models.Comment.objects.filter(post__user=user)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return comment_tree.attach_replies(page)
     
 class DashboardNotificationsList(generics.ListAPIView):
-    serializer_class = api_serializer.NotificationSerializer
+    serializer_class = api_serializer.NotificationListSerializer
     permission_classes = [AllowAny]
+    pagination_class = api_pagination.KeysetPagination
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user = api_models.User.objects.get(id=user_id)
-        return api_models.Notification.objects.filter(seen=False, user=user)
+        return api_models.Notification.objects.filter(seen=False, user=user).select_related("post").only(
+            "id", "type", "count", "seen", "date", "updated_at", "post__id", "post__title", "post__slug"
+        )
+
+
+class DashboardNotificationUnreadCount(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, user_id):
+        return Response({"unread_count": api_stats.unread_notifications(user_id)})
 
     
+def authenticate(request):
+    """The user the API's authentication classes find on a plain Django request, or None."""
+    for authentication_class in drf_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authentication_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+async def dashboard_notification_stream(request, user_id):
+    """Server-Sent Events of the signed-in author's new and updated notifications."""
+    try:
+        user = await sync_to_async(authenticate)(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+    if user.id != user_id:
+        return JsonResponse({"detail": "You can only stream your own notifications."}, status=status.HTTP_403_FORBIDDEN)
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    response = StreamingHttpResponse(api_events.stream(user_id, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from holding events back in a buffer
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 class DashboardMarkNotificationAsSeen(APIView):
     def post(self, request):
         notification_id = request.data['notification_id']
-        notification = api_models.Notification.objects.get(id=notification_id)
-
-        notification.seen = True
-        notification.save()
+        api_notifications.mark_seen(notification_id)
 
         return Response({"message" : "Notification marked as seen"}, status=status.HTTP_200_OK)
     
@@ -358,24 +466,20 @@ class DashboardPostCreateAPIView(generics.CreateAPIView):
         except api_models.Profile.DoesNotExist:
             profile = None  
 
-        post = api_models.Post.objects.create(
-            user=user,
-            profile=profile,  
-            title=title,
-            image=image,
-            description=description,
-            category=category,
-            status=post_status,
-            slug=slug,
-        )
-
-        for tag_name in tag_names:
-            tag_name = tag_name.strip()
-            if tag_name:
-                tag_obj, _ = portfolio_models.Tag.objects.get_or_create(name=tag_name)
-                post.tags.add(tag_obj)
-
-        post.save()
+        # Tags and image derivatives are filled in by background jobs.
+        with transaction.atomic():
+            post = api_models.Post.objects.create(
+                user=user,
+                profile=profile,  
+                title=title,
+                image=image,
+                description=description,
+                category=category,
+                status=post_status,
+                slug=slug,
+            )
+            if any(name.strip() for name in tag_names):
+                jobs.enqueue("posts.attach_tags", {"post_id": post.id, "names": tag_names})
         return Response({'message': "Post Created Successfully"}, status=status.HTTP_201_CREATED)
 
     
@@ -454,7 +558,7 @@ class TagUpdateDeleteView(APIView):
 class DashboardClearAllNotifications(APIView):
     def post(self, request):
         user_id = request.data.get("user_id")
-        api_models.Notification.objects.filter(user_id=user_id).update(seen=True)
+        api_notifications.mark_all_seen(user_id)
         return Response({"message": "All notifications cleared"}, status=200)
 
 
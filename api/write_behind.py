@@ -0,0 +1,117 @@
+"""
+Base class for in-process write-behind buffers.
+
+Requests ``add()`` entries to a dict guarded by a lock; a daemon thread hands
+the accumulated batch to ``write()`` every ``flush_interval`` seconds, or
+sooner once ``max_pending`` entries have been added. A failed batch is merged
+back into the buffer for the next attempt, and whatever is left is flushed
+at interpreter exit once ``install_shutdown_hook()`` has been called. A
+``flush_interval`` of 0 writes every entry straight through.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    name = "write-behind"
+    interval_setting = None
+    max_pending_setting = None
+    default_interval = 5
+    default_max_pending = 1000
+
+    def __init__(self, flush_interval=None, max_pending=None):
+        if flush_interval is None:
+            flush_interval = self._setting(self.interval_setting, self.default_interval)
+        if max_pending is None:
+            max_pending = self._setting(self.max_pending_setting, self.default_max_pending)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _setting(name, default):
+        return getattr(settings, name, default) if name else default
+
+    def combine(self, old, new):
+        """Merge two buffered values for the same key."""
+        raise NotImplementedError
+
+    def write(self, batch):
+        """Persist a ``{key: value}`` batch."""
+        raise NotImplementedError
+
+    def add(self, key, value):
+        """Buffer ``value`` under ``key`` and return everything buffered for that key."""
+        with self._lock:
+            if key in self._pending:
+                value = self.combine(self._pending[key], value)
+            self._pending[key] = value
+            self._size += 1
+            size = self._size
+
+        if not self.flush_interval:
+            self.flush()
+            return value
+        if self.max_pending and size >= self.max_pending:
+            self._wakeup.set()
+        self._ensure_thread()
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._pending.get(key, default)
+
+    def flush(self):
+        """Write the buffered batch and return how many ``add()`` calls it covered."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                size, self._size = self._size, 0
+            if not batch:
+                return 0
+
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception("Failed to flush %d buffered %s entries", size, self.name)
+                with self._lock:
+                    for key, value in batch.items():
+                        if key in self._pending:
+                            value = self.combine(value, self._pending[key])
+                        self._pending[key] = value
+                    self._size += size
+                return 0
+            return size
+
+    def install_shutdown_hook(self):
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()
@@ -0,0 +1,27 @@
+"""
+Database profiles picked from DATABASE_URL.
+
+PostgreSQL gets persistent connections (DATABASE_CONN_MAX_AGE seconds)
+checked before each request reuses them. SQLite, for single-node
+deployments, keeps connections open too and runs on backend.sqlite3, which
+tunes each new connection with the SQLITE_PRAGMAS setting: write-ahead
+logging so readers don't block the writer, ``synchronous=NORMAL`` (safe
+under WAL), a memory-mapped read window and a busy timeout for writers
+queueing on the lock.
+"""
+import dj_database_url
+
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+
+def configure(url, conn_max_age=600):
+    """A DATABASES entry for ``url``."""
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=conn_max_age > 0)
+    if config["ENGINE"] == "django.db.backends.sqlite3":
+        config["ENGINE"] = "backend.sqlite3"
+    return config
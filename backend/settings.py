@@ -12,8 +12,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-import dj_database_url
 from decouple import config
+
+from backend import database
 # from environs import Env
 import os
 # env = Env()
@@ -98,15 +99,51 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DATABASE_URL picks the database (postgres://... or sqlite:///path), falling
+# back to the bundled db.sqlite3; see backend/database.py for each profile.
+# DATABASE_CONN_MAX_AGE=0 closes the connection after every request.
+
 DATABASES = {
+    'default': database.configure(
+        config("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+        conn_max_age=config("DATABASE_CONN_MAX_AGE", default=600, cast=int),
+    )
+}
+# Applied to every new SQLite connection (backend/sqlite3), which then also begins
+# transactions IMMEDIATE; SQLITE_TUNING=False keeps SQLite's defaults
+SQLITE_PRAGMAS = database.DEFAULT_SQLITE_PRAGMAS if config("SQLITE_TUNING", default=True, cast=bool) else {}
+
+
+# Cache
+# CACHE_BACKEND picks the backend: "locmem" (per worker), "file" or "db"
+# (shared by all workers; run `manage.py createcachetable` first for "db").
+
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'txs-console-center',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config("CACHE_LOCATION", default=str(BASE_DIR / 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'response_cache',
+    },
+}
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
-# DATABASES = {
-#     'default': dj_database_url.parse(config("DATABASE_URL"))
-# }
+
+# Seconds a cached API response lives (api/response_cache.py); edits
+# invalidate it earlier through its dependency tags.
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -150,12 +187,65 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 
+# api.authentication builds request.user from the access token's claims;
+# JWT_STATELESS_AUTH=False loads the User row on every request instead.
+JWT_STATELESS_AUTH = config("JWT_STATELESS_AUTH", default=True, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
 }
 
+# Seconds a user's is_active/is_staff flags are trusted per worker
+AUTH_USER_FLAGS_CACHE_TTL = 30
+
+# Post detail views are buffered in memory and written back in batches
+# (api/view_counter.py). 0 writes every view straight through.
+VIEW_COUNTER_FLUSH_INTERVAL = config("VIEW_COUNTER_FLUSH_INTERVAL", default=5, cast=float)
+VIEW_COUNTER_MAX_PENDING = 1000
+
+# Visitor hits are buffered and upserted in batches (visitor/ingest.py)
+VISITOR_FLUSH_INTERVAL = config("VISITOR_FLUSH_INTERVAL", default=2, cast=float)
+VISITOR_MAX_PENDING = 2000
+# The visitor-stats rollup is refreshed at most this often (visitor/rollup.py)
+VISITOR_STATS_REFRESH_INTERVAL = 60
+VISITOR_STATS_TOP_N = 10
+
+# Seconds the category listing stays cached in each worker (api/category_index.py)
+CATEGORY_INDEX_CACHE_TTL = 60
+
+# Tag name -> id pairs cached per worker (portfolio/tag_index.py)
+TAG_INDEX_CACHE_SIZE = 1024
+TAG_INDEX_CACHE_TTL = 300
+
+# Resized WebP/JPEG copies of uploaded images (api/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+# Background jobs (api/jobs.py), run by `manage.py run_jobs`. JOB_QUEUE_EAGER
+# runs them in the web process after commit instead, for development.
+JOB_QUEUE_EAGER = config("JOB_QUEUE_EAGER", default=False, cast=bool)
+JOB_QUEUE_MAX_ATTEMPTS = 5
+JOB_QUEUE_BACKOFF_BASE = 2
+JOB_QUEUE_BACKOFF_MAX = 600
+JOB_QUEUE_CLAIM_TIMEOUT = 300
+JOB_QUEUE_KEEP_DONE_DAYS = 1
+
+# Seconds during which repeat likes/comments/bookmarks on a post fold into
+# one unseen notification (api/notifications.py)
+NOTIFICATION_COALESCE_WINDOW = 3600
+
+# Live notification streams (api/events.py), served by the ASGI app. Seconds
+# between checks for notifications written by other processes, between
+# keep-alive comments on idle streams, and before a stream is closed for the
+# client to reconnect.
+NOTIFICATION_STREAM_POLL_INTERVAL = 1
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_REPLAY_LIMIT = 100
+NOTIFICATION_STREAM_BUFFER = 100
+NOTIFICATION_STREAM_MAX_AGE = 300
+
 
 
 SIMPLE_JWT = {
@@ -182,6 +272,8 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    # Checks the blacklist through api.token_blacklist's in-memory filter
+    'TOKEN_REFRESH_SERIALIZER': 'api.token_blacklist.TokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -190,6 +282,15 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Refresh token blacklist (api/token_blacklist.py): expired tokens are pruned
+# in batches of TOKEN_BLACKLIST_PRUNE_BATCH; the in-memory filter of
+# blacklisted JTIs picks up other workers' rows every
+# TOKEN_BLACKLIST_SYNC_INTERVAL seconds and is rebuilt every
+# TOKEN_BLACKLIST_FILTER_REBUILD seconds.
+TOKEN_BLACKLIST_PRUNE_BATCH = 1000
+TOKEN_BLACKLIST_SYNC_INTERVAL = 2
+TOKEN_BLACKLIST_FILTER_REBUILD = 3600
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
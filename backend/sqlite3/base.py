@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite with the SQLITE_PRAGMAS setting applied to each new connection.
+
+    While those are set, transactions also begin IMMEDIATE: a transaction
+    that reads before it writes would otherwise fail with "database is
+    locked" straight away, instead of waiting out the busy timeout, when
+    another connection took the write lock in between.
+    """
+
+    def init_connection_state(self):
+        super().init_connection_state()
+        for name, value in self.pragmas().items():
+            self.connection.execute(f"PRAGMA {name} = {value}")
+
+    def pragmas(self):
+        return getattr(settings, "SQLITE_PRAGMAS", {})
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE" if self.pragmas() else "BEGIN")
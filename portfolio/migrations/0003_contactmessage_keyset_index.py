@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_rename_guthub_link_projectupload_github_link'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-submitted_at', '-id'], name='contact_submitted_id_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+import html
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# The schema and first fill of portfolio.search.project_index as it stood
+# when this migration was written; later changes ship their own migration.
+CREATE = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS portfolio_project_search "
+        "USING fts5(title, tags, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS portfolio_project_search (object_id bigint PRIMARY KEY, document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS portfolio_project_search_document_idx ON portfolio_project_search USING gin (document)",
+    ],
+}
+INSERT = {
+    "sqlite": "INSERT OR REPLACE INTO portfolio_project_search (rowid, title, tags, description) VALUES (%s, %s, %s, %s)",
+    "postgresql": (
+        "INSERT INTO portfolio_project_search (object_id, document) VALUES (%s, "
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'D'))"
+    ),
+}
+
+
+def normalize(*values):
+    text = " ".join(strip_tags(value) for value in values if value)
+    return " ".join(html.unescape(text).split())
+
+
+def create_project_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE:
+        return
+    for statement in CREATE[vendor]:
+        schema_editor.execute(statement)
+
+    ProjectUpload = apps.get_model("portfolio", "ProjectUpload")
+    projects = ProjectUpload.objects.using(schema_editor.connection.alias).prefetch_related("tags")
+    rows = [
+        (
+            project.pk,
+            normalize(project.title),
+            normalize(*(tag.name for tag in project.tags.all())),
+            normalize(project.desc),
+        )
+        for project in projects.iterator(chunk_size=500)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(INSERT[vendor], rows)
+
+
+def drop_project_search(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute("DROP TABLE IF EXISTS portfolio_project_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_contactmessage_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_project_search, drop_project_search),
+    ]
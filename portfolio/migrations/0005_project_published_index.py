@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_project_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectupload',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='project_published_created_idx'),
+        ),
+    ]
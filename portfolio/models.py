@@ -30,6 +30,10 @@ class ProjectUpload(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Partial: a bare "WHERE is_published" can't seek an index led by the flag
+            models.Index(fields=["-created_at"], condition=models.Q(is_published=True), name="project_published_created_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -65,5 +69,10 @@ class ContactMessage(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="new")
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-submitted_at", "-id"], name="contact_submitted_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.role}) - {self.status}"
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Search index for published projects (see api.search).
+
+Titles, tag names and descriptions are indexed without stemming and with
+FTS5 prefix indexes, so the last word of a query can be matched as the
+user types it.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from api.search import SearchIndex, normalize
+from portfolio import models as portfolio_models
+
+
+class ProjectSearchIndex(SearchIndex):
+    table = "portfolio_project_search"
+    model = portfolio_models.ProjectUpload
+    columns = (("title", "A"), ("tags", "B"), ("description", "D"))
+    tokenizer = "unicode61 remove_diacritics 2"
+    prefix_lengths = "2 3"
+    config = "simple"
+    where = ("o.is_published = %s", [True])
+
+    def get_queryset(self, model):
+        return model._default_manager.prefetch_related("tags").only("id", "title", "desc")
+
+    def document(self, project):
+        return (
+            normalize(project.title),
+            normalize(*(tag.name for tag in project.tags.all())),
+            normalize(project.desc),
+        )
+
+
+project_index = ProjectSearchIndex()
+
+
+def project_saved(sender, instance, **kwargs):
+    project_index.update([instance.pk])
+
+
+def project_deleted(sender, instance, **kwargs):
+    project_index.delete([instance.pk])
+
+
+def project_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            project_index.update([instance.pk])
+        return
+    # Tag.tags is the reverse side of ProjectUpload.tags; ``pk_set`` holds project ids
+    if action == "pre_clear":
+        instance._search_project_ids = list(instance.tags.values_list("pk", flat=True))
+    elif action == "post_clear":
+        project_index.update(getattr(instance, "_search_project_ids", []))
+    elif action in ("post_add", "post_remove"):
+        project_index.update(pk_set)
+
+
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        project_index.update(instance.tags.values_list("pk", flat=True))
+
+
+def tag_deleting(sender, instance, **kwargs):
+    instance._search_project_ids = list(instance.tags.values_list("pk", flat=True))
+
+
+def tag_deleted(sender, instance, **kwargs):
+    project_index.update(getattr(instance, "_search_project_ids", []))
+
+
+def connect():
+    ProjectUpload = portfolio_models.ProjectUpload
+    Tag = portfolio_models.Tag
+    post_save.connect(project_saved, sender=ProjectUpload, dispatch_uid="search_project_saved")
+    post_delete.connect(project_deleted, sender=ProjectUpload, dispatch_uid="search_project_deleted")
+    m2m_changed.connect(project_tags_changed, sender=ProjectUpload.tags.through, dispatch_uid="search_project_tags")
+    post_save.connect(tag_saved, sender=Tag, dispatch_uid="search_project_tag_saved")
+    pre_delete.connect(tag_deleting, sender=Tag, dispatch_uid="search_project_tag_deleting")
+    post_delete.connect(tag_deleted, sender=Tag, dispatch_uid="search_project_tag_deleted")
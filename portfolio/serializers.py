@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from api import images
+from . import tag_index
 from .models import ProjectUpload, ContactMessage, Tag
 
 
@@ -37,32 +39,22 @@ class ProjectUploadSerializer(serializers.ModelSerializer):
         tag_names = validated_data.pop('tag_names', None)
         project = super().update(instance, validated_data)
         if tag_names is not None:
-            project.tags.clear()
-            self._handle_tags(project, tag_names)
+            tag_index.attach(project.tags, tag_names, replace=True)
         return project
 
     def _handle_tags(self, project, tag_names):
-        for name in tag_names:
-            cleaned_name = name.strip()
-            if cleaned_name:  
-                tag, _created = Tag.objects.get_or_create(name=cleaned_name)
-                project.tags.add(tag)
+        tag_index.attach(project.tags, tag_names)
 
 
-    def _handle_tags(self, project, tag_names):
-        for name in tag_names:
-            cleaned_name = name.strip()
-            if cleaned_name:
-                tag, _ = Tag.objects.get_or_create(name=cleaned_name)
-                project.tags.add(tag)
-
-class ProjectUploadSerializer(serializers.ModelSerializer):
+class ProjectCardSerializer(serializers.ModelSerializer):
+    """Read-only card for the public project list."""
     tag_names = serializers.SerializerMethodField()
     src = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProjectUpload
-        fields = ['title', 'desc', 'live_link', 'github_link', 'tag_names', 'src']
+        fields = ['title', 'desc', 'live_link', 'github_link', 'tag_names', 'src', 'srcset']
 
     def get_tag_names(self, obj):
         return ", ".join(tag.name for tag in obj.tags.all())
@@ -73,6 +65,9 @@ class ProjectUploadSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return ""
 
+    def get_srcset(self, obj):
+        return images.variants(obj.image, self.context.get('request'))
+
 
 class ContactMessageSerializer(serializers.ModelSerializer):
     class Meta:
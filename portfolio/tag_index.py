@@ -0,0 +1,116 @@
+"""
+Tag name resolution shared by the blog and portfolio write paths.
+
+``resolve()`` turns a list of tag names into Tag ids with at most one
+``name__in`` select and one ``bulk_create`` for the names that don't exist
+yet. Recently used name -> id pairs are kept in a small per-process LRU
+cache, cleared when a Tag is renamed or deleted in this process and
+expiring after TAG_INDEX_CACHE_TTL seconds so deletes made by other
+workers are picked up too.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from portfolio import models as portfolio_models
+
+_lock = threading.Lock()
+_ids = OrderedDict()
+_generation = 0
+
+
+def normalize(names):
+    """Stripped, whitespace-collapsed names without blanks or repeats, in order."""
+    seen = {}
+    for name in names:
+        name = " ".join((name or "").split())
+        if name and name not in seen:
+            seen[name] = None
+    return list(seen)
+
+
+def _cached(names):
+    now = time.monotonic()
+    found = {}
+    with _lock:
+        for name in names:
+            entry = _ids.get(name)
+            if entry is None:
+                continue
+            tag_id, expires = entry
+            if expires < now:
+                del _ids[name]
+                continue
+            _ids.move_to_end(name)
+            found[name] = tag_id
+        return found, _generation
+
+
+def _remember(found, generation):
+    size = getattr(settings, "TAG_INDEX_CACHE_SIZE", 1024)
+    expires = time.monotonic() + getattr(settings, "TAG_INDEX_CACHE_TTL", 300)
+    with _lock:
+        # Don't keep ids read before an invalidation that raced with us.
+        if generation != _generation:
+            return
+        for name, tag_id in found.items():
+            _ids[name] = (tag_id, expires)
+            _ids.move_to_end(name)
+        while len(_ids) > size:
+            _ids.popitem(last=False)
+
+
+def resolve(names):
+    """Ids of the tags called ``names``, creating the missing ones."""
+    names = normalize(names)
+    found, generation = _cached(names)
+    missing = [name for name in names if name not in found]
+
+    if missing:
+        Tag = portfolio_models.Tag
+        loaded = dict(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        new = [name for name in missing if name not in loaded]
+        if new:
+            # ignore_conflicts: another request may be creating the same names.
+            Tag.objects.bulk_create([Tag(name=name) for name in new], ignore_conflicts=True)
+            created = list(Tag.objects.filter(name__in=new))
+            # bulk_create skips post_save; the tag counters and caches listen for it.
+            for tag in created:
+                post_save.send(sender=Tag, instance=tag, created=True, update_fields=None, raw=False, using=tag._state.db)
+            loaded.update((tag.name, tag.id) for tag in created)
+        _remember(loaded, generation)
+        found.update(loaded)
+
+    return [found[name] for name in names if name in found]
+
+
+def attach(manager, names, replace=False):
+    """
+    Add the tags called ``names`` to a ``tags`` related manager, or make them
+    its only tags with ``replace``. ``add()``/``set()`` with ids write the
+    through rows in one ``bulk_create`` and still send ``m2m_changed``.
+    """
+    tag_ids = resolve(names)
+    if replace:
+        manager.set(tag_ids)
+    elif tag_ids:
+        manager.add(*tag_ids)
+    return tag_ids
+
+
+def invalidate(sender=None, instance=None, created=False, **kwargs):
+    global _generation
+    if created:
+        return
+    with _lock:
+        _ids.clear()
+        _generation += 1
+
+
+def connect():
+    Tag = portfolio_models.Tag
+    post_save.connect(invalidate, sender=Tag, dispatch_uid="tag_index_saved")
+    post_delete.connect(invalidate, sender=Tag, dispatch_uid="tag_index_deleted")
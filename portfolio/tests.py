@@ -1,3 +1,119 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import models as api_models
+from portfolio import tag_index
+from portfolio.models import ProjectUpload, Tag
+from portfolio.views import ProjectSearchFilter
+
+
+class ProjectTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Per-process; the ids it holds are rolled back with each test
+        tag_index.invalidate()
+        self.author = api_models.User.objects.create(email="author@example.com", username="author")
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create(self, **data):
+        project = {"title": "Console", "desc": "-", "live_link": "-", "github_link": "-", **data}
+        return self.client.post("/api/portfolio/projects/", project, format="json")
+
+    def test_create_resolves_posted_tag_names(self):
+        Tag.objects.create(name="django")
+        response = self.create(tag_names=["django", " New  Tag ", "django"])
+
+        self.assertEqual(response.status_code, 201, response.content)
+        project = ProjectUpload.objects.get(pk=response.data["id"])
+        self.assertEqual(sorted(project.tags.values_list("name", flat=True)), ["New Tag", "django"])
+        self.assertEqual(Tag.objects.filter(name="django").count(), 1)
+        self.assertEqual(sorted(tag["name"] for tag in response.data["tags"]), ["New Tag", "django"])
+
+    def test_update_replaces_tags(self):
+        project_id = self.create(tag_names=["a", "b"]).data["id"]
+        response = self.client.patch(f"/api/portfolio/projects/{project_id}/", {"tag_names": ["b", "c"]}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(sorted(ProjectUpload.objects.get(pk=project_id).tags.values_list("name", flat=True)), ["b", "c"])
+
+    def test_list_and_detail_load_only_what_they_render(self):
+        project_id = self.create(tag_names=["a"]).data["id"]
+        self.create(title="Second", tag_names=["b"])
+        client = APIClient()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/portfolio/projects/")
+        self.assertEqual(response.status_code, 200)
+        # The projects with their authors, then their tags
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('"api_user"."password"', ctx.captured_queries[0]["sql"])
+        self.assertEqual([project["author_username"] for project in response.data], ["author", "author"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f"/api/portfolio/projects/{project_id}/")
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual((response.data["desc"], response.data["live_link"]), ("-", "-"))
+
+    def test_public_list_renders_cards(self):
+        self.create(tag_names=["a"])
+        response = APIClient().get("/api/portfolio/projects/view/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["tag_names"], "a")
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        tag_index.invalidate()
+
+    def test_resolve_creates_missing_names_once(self):
+        existing = Tag.objects.create(name="python")
+        with CaptureQueriesContext(connection) as ctx:
+            ids = tag_index.resolve(["python", "rust", "rust", ""])
+        tag_queries = [q["sql"] for q in ctx.captured_queries if '"portfolio_tag"' in q["sql"]]
+        # One lookup, one insert of the missing name, one read of its id
+        self.assertEqual(len(tag_queries), 3, tag_queries)
+        self.assertEqual(ids[0], existing.id)
+        self.assertEqual(list(Tag.objects.filter(id__in=ids).values_list("name", flat=True).order_by("id")), ["python", "rust"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_index.resolve(["rust", "python"]), [ids[1], ids[0]])
+
+    def test_renamed_tag_is_not_served_from_the_cache(self):
+        tag = Tag.objects.create(name="old")
+        tag_index.resolve(["old"])
+        tag.name = "new"
+        tag.save()
+
+        [created] = tag_index.resolve(["old"])
+        self.assertNotEqual(created, tag.id)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class ProjectSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = api_models.User.objects.create(email="author@example.com", username="author")
+        project = {"author": author, "live_link": "-", "github_link": "-", "is_published": True}
+        self.title_match = ProjectUpload.objects.create(title="Console dashboard", desc="Admin tools", **project)
+        self.desc_match = ProjectUpload.objects.create(title="Portfolio", desc="Built around a console", **project)
+        ProjectUpload.objects.create(title="Unrelated", desc="Nothing here", **project)
+        ProjectUpload.objects.create(title="Console draft", desc="-", **{**project, "is_published": False})
+
+    def search(self, query):
+        response = APIClient().get("/api/portfolio/projects/", {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data]
+
+    def test_published_matches_best_first(self):
+        self.assertEqual(self.search("cons"), [self.title_match.id, self.desc_match.id])
+
+    def test_results_are_capped(self):
+        with mock.patch.object(ProjectSearchFilter, "max_results", 1):
+            self.assertEqual(self.search("console"), [self.title_match.id])
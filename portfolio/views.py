@@ -1,26 +1,71 @@
+from django.db.models import Case, IntegerField, When
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.throttling import UserRateThrottle
+from api.conditional import ConditionalGetMixin, queryset_validators
+from api.pagination import KeysetPagination
+from api.response_cache import CachedResponseMixin
 from .models import ProjectUpload, ContactMessage
-from .serializers import ProjectUploadSerializer, ContactMessageSerializer
+from .search import project_index
+from .serializers import ProjectCardSerializer, ProjectUploadSerializer, ContactMessageSerializer
 
 class StandardUserThrottle(UserRateThrottle):
     rate = '10/min'
 
 
+class ContactMessagePagination(KeysetPagination):
+    ordering = ('submitted_at', 'id')
+
+
+class ProjectSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` over the project search index (portfolio/search.py) instead
+    of ``LIKE`` scans across the tag join. Each project appears once, best
+    match first; the last word is matched as a prefix for type-ahead.
+    The list is unpaginated, so only the ``max_results`` best matches are
+    returned (and reordered by ``?ordering=``).
+    """
+    max_results = 50
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        pks = project_index.search(query, limit=self.max_results, prefix=True)
+        rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(pks)], output_field=IntegerField())
+        return queryset.filter(pk__in=pks).order_by(rank) if pks else queryset.none()
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """Keep search results in rank order unless ``?ordering=`` asks otherwise."""
+
+    def get_default_ordering(self, view):
+        if self.get_search_query(view):
+            return None
+        return super().get_default_ordering(view)
+
+    def get_search_query(self, view):
+        return view.request.query_params.get(ProjectSearchFilter.search_param, '').strip()
+
+
+def project_queryset():
+    # ProjectUploadSerializer renders every project column but only the author's username
+    return ProjectUpload.objects.select_related('author').prefetch_related('tags').only(
+        'id', 'author__username', 'title', 'slug', 'desc', 'live_link', 'github_link',
+        'image', 'is_published', 'created_at', 'updated_at'
+    )
+
+
 class ProjectUploadListCreateView(generics.ListCreateAPIView):
     serializer_class = ProjectUploadSerializer
     throttle_classes = [StandardUserThrottle]
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'desc', 'tags__name']
+    filter_backends = [ProjectSearchFilter, ProjectOrderingFilter]
     ordering_fields = ['created_at', 'title']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return ProjectUpload.objects.select_related('author').prefetch_related('tags').only(
-            'id', 'author__username', 'title', 'slug', 'image', 'created_at', 'is_published'
-        ).filter(is_published=True)
+        return project_queryset().filter(is_published=True)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -33,7 +78,7 @@ class ProjectUploadDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ProjectUpload.objects.filter(is_published=True)
 
     def get_queryset(self):
-        return ProjectUpload.objects.select_related('author').prefetch_related('tags')
+        return project_queryset()
 
 
 class ContactMessageCreateView(generics.CreateAPIView):
@@ -51,13 +96,19 @@ class ContactMessageListView(generics.ListAPIView):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [IsAdminUser]  # Restrict access to admin users or implement custom permission
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = ContactMessagePagination  # Newest first, keyed on (submitted_at, id)
+    filter_backends = [filters.SearchFilter]
     search_fields = ['first_name', 'last_name', 'email', 'message']
-    ordering = ['-submitted_at']
 
-class ProjectListView(generics.ListAPIView):
+class ProjectListView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     queryset = ProjectUpload.objects.filter(is_published=True)
-    serializer_class = ProjectUploadSerializer
+    serializer_class = ProjectCardSerializer
+
+    def get_cache_tags(self):
+        return ['project-list']
+
+    def get_validators(self):
+        return queryset_validators(self.get_queryset(), 'updated_at', self.get_cache_tags())
 
     def get_serializer_context(self):
         return {'request': self.request}
\ No newline at end of file
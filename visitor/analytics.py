@@ -0,0 +1,84 @@
+"""
+Time-bucketed visitor analytics.
+
+Each ingest flush appends its hits to VisitEvent and folds them into the
+hourly and daily rollups: the visit counter goes up and the bucket's
+HyperLogLog sketch absorbs the visitor ips. Range queries read only the
+rollups, one indexed scan over ``bucket``, and merge the sketches for the
+range-wide unique count.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+
+from .hyperloglog import HyperLogLog
+from .models import DailyVisitRollup, HourlyVisitRollup, VisitEvent
+
+GRANULARITIES = {
+    "hour": (HourlyVisitRollup, timedelta(hours=1)),
+    "day": (DailyVisitRollup, timedelta(days=1)),
+}
+MAX_BUCKETS = 2000
+
+
+def truncate(moment, granularity):
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def record(batch):
+    """Append a ``{ip: Visit}`` ingest batch to the event log and the rollups."""
+    VisitEvent.objects.bulk_create([
+        VisitEvent(ip=ip, count=visit.count, visited_at=visit.last_visited) for ip, visit in batch.items()
+    ])
+    for granularity, (model, _step) in GRANULARITIES.items():
+        buckets = defaultdict(list)
+        for ip, visit in batch.items():
+            buckets[truncate(visit.last_visited, granularity)].append((ip, visit.count))
+        _fold(model, buckets)
+
+
+def _fold(model, buckets):
+    with transaction.atomic():
+        model.objects.bulk_create([model(bucket=bucket) for bucket in buckets], ignore_conflicts=True)
+        for rollup in model.objects.select_for_update().filter(bucket__in=list(buckets)):
+            sketch = HyperLogLog.from_bytes(rollup.sketch)
+            for ip, count in buckets[rollup.bucket]:
+                sketch.add(ip)
+                rollup.visits += count
+            rollup.sketch = sketch.to_bytes()
+            rollup.save(update_fields=["visits", "sketch"])
+
+
+def timeseries(granularity, start, end):
+    """
+    Buckets in ``[start, end)`` with their visits and approximate unique
+    visitors, plus the unique visitors across the whole range.
+    """
+    model, step = GRANULARITIES[granularity]
+    start = truncate(start, granularity)
+    if (end - start) / step > MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {granularity} buckets")
+
+    overall = HyperLogLog()
+    points, total_visits = [], 0
+    for rollup in model.objects.filter(bucket__gte=start, bucket__lt=end).order_by("bucket"):
+        sketch = HyperLogLog.from_bytes(rollup.sketch)
+        overall.merge(sketch)
+        total_visits += rollup.visits
+        points.append({
+            "bucket": rollup.bucket,
+            "visits": rollup.visits,
+            "uniqueVisitors": sketch.count(),
+        })
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "totalVisits": total_visits,
+        "uniqueVisitors": overall.count(),
+        "buckets": points,
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VisitorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'visitor'
+
+    def ready(self):
+        from .ingest import visit_buffer
+        visit_buffer.install_shutdown_hook()
@@ -0,0 +1,98 @@
+"""
+Buffered visitor ingestion.
+
+``add_visitor`` only records the hit in memory. Every VISITOR_FLUSH_INTERVAL
+seconds the accumulated hits are written as one multi-row
+``INSERT ... ON CONFLICT (ip) DO UPDATE SET view_count = view_count + n``,
+so concurrent workers never lose increments and a page view costs no
+synchronous database write.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.write_behind import WriteBehindBuffer
+from .models import Visitor
+
+# ``location`` and ``user_agent`` are only stored for new visitors, as before.
+Visit = namedtuple("Visit", "count location user_agent last_visited")
+
+UPSERT_BATCH_SIZE = 500
+
+
+class VisitBuffer(WriteBehindBuffer):
+    name = "visitor"
+    interval_setting = "VISITOR_FLUSH_INTERVAL"
+    max_pending_setting = "VISITOR_MAX_PENDING"
+    default_interval = 2
+
+    def record(self, ip, location=None, user_agent=None):
+        return self.add(ip, Visit(1, location, user_agent, timezone.now()))
+
+    def combine(self, old, new):
+        return Visit(
+            old.count + new.count,
+            old.location if old.location is not None else new.location,
+            old.user_agent if old.user_agent is not None else new.user_agent,
+            max(old.last_visited, new.last_visited),
+        )
+
+    def write(self, batch):
+        from . import analytics, rollup
+
+        with transaction.atomic():
+            upsert_visits(batch)
+            analytics.record(batch)
+        rollup.refresh_if_stale()
+
+
+def upsert_visits(batch):
+    """Apply a ``{ip: Visit}`` batch."""
+    visits = list(batch.items())
+    with transaction.atomic():
+        for start in range(0, len(visits), UPSERT_BATCH_SIZE):
+            chunk = visits[start:start + UPSERT_BATCH_SIZE]
+            if connection.vendor in ("sqlite", "postgresql"):
+                _upsert_on_conflict(chunk)
+            else:
+                _upsert_fallback(chunk)
+
+
+def _upsert_on_conflict(chunk):
+    opts = Visitor._meta
+    qn = connection.ops.quote_name
+    fields = [opts.get_field(name) for name in ("ip", "location", "user_agent", "view_count", "last_visited")]
+    table = qn(opts.db_table)
+    ip, _location, _user_agent, view_count, last_visited = (qn(field.column) for field in fields)
+
+    params = []
+    for address, visit in chunk:
+        values = (address, visit.location, visit.user_agent, visit.count, visit.last_visited)
+        params.extend(field.get_db_prep_save(value, connection) for field, value in zip(fields, values))
+
+    row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(field.column) for field in fields)}) "
+        f"VALUES {', '.join([row] * len(chunk))} "
+        f"ON CONFLICT ({ip}) DO UPDATE SET "
+        f"{view_count} = {table}.{view_count} + EXCLUDED.{view_count}, "
+        f"{last_visited} = EXCLUDED.{last_visited}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _upsert_fallback(chunk):
+    for address, visit in chunk:
+        updated = Visitor.objects.filter(ip=address).update(
+            view_count=F("view_count") + visit.count, last_visited=visit.last_visited
+        )
+        if not updated:
+            Visitor.objects.create(
+                ip=address, location=visit.location, user_agent=visit.user_agent, view_count=visit.count
+            )
+
+
+visit_buffer = VisitBuffer()
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from api import benchmarks
+from visitor.ingest import VisitBuffer
+from visitor.models import Visitor
+
+# TEST-NET-2 (RFC 5737), so the load test never collides with real visitors.
+IP_PREFIX = "198.51.100."
+
+
+class MainThreadVisitBuffer(VisitBuffer):
+    """Flushed by the command itself, on the connection that gets rolled back."""
+
+    def _ensure_thread(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Load-test the buffered visitor ingestion: sustained events/sec and lost increments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--events", type=int, default=20000, help="Events per thread")
+        parser.add_argument("--ips", type=int, default=200)
+        parser.add_argument("--flush-interval", type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        threads, events, ips = options["threads"], options["events"], options["ips"]
+        if not 0 < ips <= 254:
+            raise CommandError("--ips must be between 1 and 254")
+        addresses = [f"{IP_PREFIX}{i + 1}" for i in range(ips)]
+        test_visitors = Visitor.objects.filter(ip__startswith=IP_PREFIX)
+        buffer = MainThreadVisitBuffer(flush_interval=options["flush_interval"], max_pending=10000)
+
+        def produce(offset):
+            for i in range(events):
+                buffer.record(addresses[(offset + i) % ips], {"bench": True}, "bench")
+
+        # Visitors, events and rollups written by the flushes are all rolled back.
+        with benchmarks.rolled_back():
+            test_visitors.delete()
+            workers = [threading.Thread(target=produce, args=(n,)) for n in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            while any(worker.is_alive() for worker in workers):
+                time.sleep(buffer.flush_interval)
+                buffer.flush()
+            for worker in workers:
+                worker.join()
+            buffer.flush()
+            seconds = time.perf_counter() - start
+
+            total = threads * events
+            stored = test_visitors.aggregate(views=Sum("view_count"))["views"] or 0
+            rows = test_visitors.count()
+
+        self.stdout.write(f"{total} events from {threads} threads in {seconds:.2f}s: {total / seconds:,.0f} events/sec")
+        self.stdout.write(f"stored view_count={stored} across {rows} rows (expected {total} across {ips})")
+        if stored != total or rows != ips:
+            raise CommandError(f"Lost {total - stored} increments")
+        self.stdout.write(self.style.SUCCESS("No increments lost."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from visitor import rollup
+
+
+class Command(BaseCommand):
+    help = "Recompute the VisitorStats rollup row."
+
+    def handle(self, *args, **options):
+        stats = rollup.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats.total_visitors} visitors, {stats.total_visits} visits."
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visitor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visitor',
+            index=models.Index(fields=['-last_visited', '-id'], name='visitor_last_visited_id_idx'),
+        ),
+    ]
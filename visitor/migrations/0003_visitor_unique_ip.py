@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def merge_duplicate_ips(apps, schema_editor):
+    Visitor = apps.get_model("visitor", "Visitor")
+    duplicates = (
+        Visitor.objects.values("ip")
+        .annotate(rows=Count("id"), views=Sum("view_count"), last=Max("last_visited"), keep=Max("id"))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Visitor.objects.filter(ip=dup["ip"]).exclude(id=dup["keep"]).delete()
+        Visitor.objects.filter(id=dup["keep"]).update(view_count=dup["views"], last_visited=dup["last"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visitor', '0002_visitor_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_ips, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='visitor',
+            name='ip',
+            field=models.GenericIPAddressField(unique=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visitor', '0003_visitor_unique_ip'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_visitors', models.PositiveIntegerField(default=0)),
+                ('total_visits', models.PositiveBigIntegerField(default=0)),
+                ('top_visitors', models.JSONField(default=list)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='visitor',
+            index=models.Index(fields=['-view_count', 'id'], name='visitor_view_count_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visitor', '0004_visitorstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVisitRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('visits', models.PositiveBigIntegerField(default=0)),
+                ('sketch', models.BinaryField(default=bytes)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyVisitRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('visits', models.PositiveBigIntegerField(default=0)),
+                ('sketch', models.BinaryField(default=bytes)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VisitEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip', models.GenericIPAddressField()),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('visited_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -2,11 +2,65 @@ from django.db import models
 
 # Create your models here.
 class Visitor(models.Model):
-    ip = models.GenericIPAddressField()
+    ip = models.GenericIPAddressField(unique=True)
     location = models.JSONField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     view_count = models.PositiveIntegerField(default=1)
     last_visited = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-last_visited", "-id"], name="visitor_last_visited_id_idx"),
+            models.Index(fields=["-view_count", "id"], name="visitor_view_count_idx"),
+        ]
+
+    def __str__(self):
+        return self.ip
+
+
+class VisitorStats(models.Model):
+    """
+    Single-row rollup of the visitor totals and top visitors, refreshed by
+    visitor/rollup.py so the stats endpoint never scans Visitor.
+    """
+    total_visitors = models.PositiveIntegerField(default=0)
+    total_visits = models.PositiveBigIntegerField(default=0)
+    top_visitors = models.JSONField(default=list)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Visitor stats ({self.refreshed_at})"
+
+
+class VisitEvent(models.Model):
+    """
+    Append-only visit log. Each row is one ip's hits within one ingest
+    flush, stamped with the last of them.
+    """
+    ip = models.GenericIPAddressField()
+    count = models.PositiveIntegerField(default=1)
+    visited_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.ip} x{self.count} @ {self.visited_at}"
+
+
+class VisitRollup(models.Model):
+    """Visits and a HyperLogLog sketch of visitor ips for one time bucket (UTC)."""
+    bucket = models.DateTimeField(unique=True)
+    visits = models.PositiveBigIntegerField(default=0)
+    sketch = models.BinaryField(default=bytes)
+
+    class Meta:
+        abstract = True
+
     def __str__(self):
-        return self.ip
\ No newline at end of file
+        return f"{self.bucket}: {self.visits}"
+
+
+class HourlyVisitRollup(VisitRollup):
+    pass
+
+
+class DailyVisitRollup(VisitRollup):
+    pass
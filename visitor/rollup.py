@@ -0,0 +1,52 @@
+"""
+Rollup of the visitor statistics.
+
+Totals come from one ``aggregate`` and the top visitors from an indexed
+``ORDER BY view_count DESC LIMIT n``. The result is stored in the single
+VisitorStats row, refreshed after an ingest flush once it is older than
+VISITOR_STATS_REFRESH_INTERVAL seconds, or with
+``manage.py refresh_visitor_stats``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Visitor, VisitorStats
+from .serializers import VisitorSerializer
+
+STATS_ID = 1
+
+
+def top_n():
+    return getattr(settings, "VISITOR_STATS_TOP_N", 10)
+
+
+def refresh():
+    totals = Visitor.objects.aggregate(visitors=Count("id"), visits=Sum("view_count"))
+    top = Visitor.objects.order_by("-view_count", "id")[:top_n()]
+    stats, _created = VisitorStats.objects.update_or_create(
+        pk=STATS_ID,
+        defaults={
+            "total_visitors": totals["visitors"],
+            "total_visits": totals["visits"] or 0,
+            "top_visitors": VisitorSerializer(top, many=True).data,
+            "refreshed_at": timezone.now(),
+        },
+    )
+    return stats
+
+
+def refresh_if_stale():
+    interval = timedelta(seconds=getattr(settings, "VISITOR_STATS_REFRESH_INTERVAL", 60))
+    fresh = VisitorStats.objects.filter(pk=STATS_ID, refreshed_at__gte=timezone.now() - interval).exists()
+    if not fresh:
+        refresh()
+
+
+def get_stats():
+    stats = VisitorStats.objects.filter(pk=STATS_ID).first()
+    if stats is None:
+        stats = refresh()
+    return stats
@@ -1,3 +1,134 @@
-from django.test import TestCase
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from visitor import analytics, rollup
+from visitor.hyperloglog import HyperLogLog
+from visitor.ingest import Visit, VisitBuffer, upsert_visits, visit_buffer
+from visitor.models import Visitor, VisitorStats
+
+
+class VisitorIngestTests(TestCase):
+    def setUp(self):
+        # Flushed by hand below, on the test's connection
+        patcher = mock.patch.object(VisitBuffer, "_ensure_thread")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(visit_buffer.flush)
+
+    def test_batches_add_to_existing_counts(self):
+        now = timezone.now()
+        upsert_visits({
+            "203.0.113.1": Visit(2, {"city": "Lagos"}, "first", now - timedelta(minutes=1)),
+            "203.0.113.2": Visit(1, None, None, now - timedelta(minutes=1)),
+        })
+        upsert_visits({"203.0.113.1": Visit(3, {"city": "Accra"}, "second", now)})
+
+        first = Visitor.objects.get(ip="203.0.113.1")
+        self.assertEqual((first.view_count, first.location, first.user_agent), (5, {"city": "Lagos"}, "first"))
+        self.assertEqual(first.last_visited, now)
+        self.assertEqual(Visitor.objects.get(ip="203.0.113.2").view_count, 1)
+
+    def test_hits_are_buffered_then_upserted_once_per_ip(self):
+        client = APIClient()
+        for ip in ("203.0.113.7", "203.0.113.7", "2001:db8::1", "203.0.113.7"):
+            response = client.post("/api/visitor/add-visitor/", {"ip": ip, "userAgent": "test"}, format="json")
+            self.assertEqual(response.status_code, 202)
+        self.assertFalse(Visitor.objects.exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(visit_buffer.flush(), 4)
+        upserts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "visitor_visitor"')]
+        self.assertEqual(len(upserts), 1, upserts)
+        self.assertEqual(dict(Visitor.objects.values_list("ip", "view_count")), {"203.0.113.7": 3, "2001:db8::1": 1})
+
+    def test_invalid_ip_is_rejected(self):
+        client = APIClient()
+        for ip in (None, "", "not-an-ip", "300.1.1.1"):
+            response = client.post("/api/visitor/add-visitor/", {"ip": ip}, format="json")
+            self.assertEqual(response.status_code, 400, ip)
+            self.assertEqual(response.data, {"message": "A valid ip is required"})
+        self.assertEqual(visit_buffer.flush(), 0)
+
+
+@override_settings(VISITOR_STATS_TOP_N=2)
+class VisitorStatsTests(TestCase):
+    def setUp(self):
+        for ip, views in (("203.0.113.1", 4), ("203.0.113.2", 9), ("203.0.113.3", 1), ("203.0.113.4", 9)):
+            Visitor.objects.create(ip=ip, view_count=views)
+
+    def test_rollup_totals_and_top_visitors(self):
+        stats = rollup.refresh()
+        self.assertEqual((stats.total_visitors, stats.total_visits), (4, 23))
+        # Ties keep the older visitor first
+        self.assertEqual([visitor["ip"] for visitor in stats.top_visitors], ["203.0.113.2", "203.0.113.4"])
+
+        response = APIClient().get("/api/visitor/visitor-stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["totalVisitors"], response.data["totalVisits"]), (4, 23))
+        self.assertEqual(response.data["topVisitor"]["ip"], "203.0.113.2")
+
+    def test_stale_rollup_is_refreshed_and_fresh_one_kept(self):
+        rollup.refresh()
+        Visitor.objects.create(ip="203.0.113.5", view_count=50)
+        rollup.refresh_if_stale()
+        self.assertEqual(rollup.get_stats().total_visits, 23)
+
+        VisitorStats.objects.update(refreshed_at=timezone.now() - timedelta(hours=1))
+        rollup.refresh_if_stale()
+        stats = rollup.get_stats()
+        self.assertEqual((stats.total_visits, stats.top_visitors[0]["ip"]), (73, "203.0.113.5"))
+
+    def test_failures_are_logged(self):
+        with mock.patch.object(rollup, "get_stats", side_effect=RuntimeError("boom")), \
+                self.assertLogs("visitor.views", "ERROR"):
+            response = APIClient().get("/api/visitor/visitor-stats/")
+        self.assertEqual(response.status_code, 500)
+
+
+class VisitAnalyticsTests(TestCase):
+    def test_hits_land_in_their_utc_hour_and_day(self):
+        end_of_day = datetime(2026, 3, 1, 23, 59, 59, tzinfo=dt_timezone.utc)
+        next_day = datetime(2026, 3, 2, 0, 0, tzinfo=dt_timezone.utc)
+        analytics.record({
+            "203.0.113.1": Visit(2, None, None, end_of_day),
+            "203.0.113.2": Visit(1, None, None, end_of_day.replace(minute=0, second=0)),
+            "203.0.113.3": Visit(5, None, None, next_day),
+        })
+
+        hours = analytics.timeseries("hour", end_of_day - timedelta(hours=1), next_day + timedelta(hours=1))
+        self.assertEqual(
+            [(point["bucket"].hour, point["visits"], point["uniqueVisitors"]) for point in hours["buckets"]],
+            [(23, 3, 2), (0, 5, 1)],
+        )
+        days = analytics.timeseries("day", end_of_day, next_day + timedelta(days=1))
+        self.assertEqual([(point["bucket"].day, point["visits"]) for point in days["buckets"]], [(1, 3), (2, 5)])
+        self.assertEqual((days["totalVisits"], days["uniqueVisitors"]), (8, 3))
+
+        # The end of the range is exclusive
+        first_day = analytics.timeseries("day", end_of_day, next_day)
+        self.assertEqual([point["visits"] for point in first_day["buckets"]], [3])
+
+    def test_unique_estimate_is_within_the_error_bound(self):
+        sketch, other = HyperLogLog(), HyperLogLog()
+        for i in range(20000):
+            sketch.add(f"10.0.{i // 256}.{i % 256}")
+        for i in range(10000, 30000):
+            other.add(f"10.0.{i // 256}.{i % 256}")
+
+        # Three standard errors of 1.04 / sqrt(m)
+        bound = 3 * 1.04 / math.sqrt(sketch.m)
+        self.assertLess(abs(sketch.count() - 20000) / 20000, bound)
+        merged = HyperLogLog.from_bytes(sketch.to_bytes()).merge(other)
+        self.assertLess(abs(merged.count() - 30000) / 30000, bound)
+
+        small = HyperLogLog()
+        for ip in ("203.0.113.1", "203.0.113.2", "203.0.113.1"):
+            small.add(ip)
+        self.assertEqual(small.count(), 2)
@@ -4,4 +4,6 @@ from . import views
 urlpatterns = [
     path('add-visitor/', views.add_visitor, name='add_visitor'),
     path('visitor-stats/', views.get_visitor_stats, name='visitor_stats'),
+    path('visitors/', views.list_visitors, name='visitor_list'),
+    path('timeseries/', views.get_visitor_timeseries, name='visitor_timeseries'),
 ]
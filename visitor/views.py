@@ -1,9 +1,25 @@
+import logging
+
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from datetime import timedelta, timezone as dt_timezone
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.pagination import KeysetPagination
+from . import analytics, rollup
+from .ingest import visit_buffer
 from .models import Visitor
 from .serializers import VisitorSerializer
 
+logger = logging.getLogger(__name__)
+
+
+class VisitorPagination(KeysetPagination):
+    ordering = ('last_visited', 'id')
+
+
 @api_view(['POST'])
 def add_visitor(request):
     ip = request.data.get('ip')
@@ -11,41 +27,67 @@ def add_visitor(request):
     user_agent = request.data.get('userAgent')
 
     try:
-        visitor, created = Visitor.objects.get_or_create(ip=ip)
-        if not created:
-            visitor.view_count += 1
-            visitor.save()
-        else:
-            visitor.location = location
-            visitor.user_agent = user_agent
-            visitor.save()
-
-        serializer = VisitorSerializer(visitor)
-        return Response({'message': 'Visitor tracked successfully', 'visitor': serializer.data}, status=200)
-
-    except Exception as e:
-        print("Error in adding visitor:", e)
-        return Response({'message': 'Internal Server Error'}, status=500)
+        ip = Visitor._meta.get_field('ip').clean(ip, None)
+    except ValidationError:
+        return Response({'message': 'A valid ip is required'}, status=400)
+
+    # Buffered and upserted in batches, see visitor/ingest.py
+    visit_buffer.record(ip, location, user_agent)
+    return Response({'message': 'Visitor tracked successfully'}, status=202)
 
 
 @api_view(['GET'])
 def get_visitor_stats(request):
     try:
-        visitors = Visitor.objects.all()
-        total_visitors = visitors.count()
-        total_visits = sum([v.view_count for v in visitors])
-        top_visitor = visitors.order_by('-view_count').first()
-
-        serializer = VisitorSerializer(visitors, many=True)
-        top_serializer = VisitorSerializer(top_visitor)
+        # Served from the rollup row, see visitor/rollup.py
+        stats = rollup.get_stats()
 
         return Response({
-            'visitors': serializer.data,
-            'totalVisitors': total_visitors,
-            'totalVisits': total_visits,
-            'topVisitor': top_serializer.data
+            'totalVisitors': stats.total_visitors,
+            'totalVisits': stats.total_visits,
+            'topVisitor': stats.top_visitors[0] if stats.top_visitors else {},
+            'topVisitors': stats.top_visitors,
+            'refreshedAt': stats.refreshed_at,
         }, status=200)
 
-    except Exception as e:
-        print("Error in fetching visitor stats:", e)
+    except Exception:
+        logger.exception("Failed to fetch visitor stats")
         return Response({'message': 'Internal Server Error'}, status=500)
+
+
+@api_view(['GET'])
+def list_visitors(request):
+    paginator = VisitorPagination()
+    page = paginator.paginate_queryset(Visitor.objects.all(), request)
+    serializer = VisitorSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+def get_visitor_timeseries(request):
+    granularity = request.query_params.get('granularity', 'hour')
+    if granularity not in analytics.GRANULARITIES:
+        return Response({'message': 'granularity must be "hour" or "day"'}, status=400)
+
+    # Defaults: the last 24 hours, or the last 7 days
+    end = timezone.now()
+    start = end - (timedelta(hours=24) if granularity == 'hour' else timedelta(days=7))
+    try:
+        if 'start' in request.query_params:
+            start = _parse_moment(request.query_params['start'])
+        if 'end' in request.query_params:
+            end = _parse_moment(request.query_params['end'])
+        data = analytics.timeseries(granularity, start, end)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=400)
+
+    return Response(data, status=200)
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value) or parse_datetime(f"{value}T00:00:00")
+    if moment is None:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment